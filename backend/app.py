@@ -1,20 +1,161 @@
-from flask import Flask, render_template, send_file, redirect, url_for, flash, send_from_directory
+from flask import Flask, render_template, redirect, url_for, flash, send_from_directory, jsonify, request, make_response, g
 import pandas as pd
+import numpy as np
 import matplotlib
 matplotlib.use('Agg') # Use non-interactive backend
 import matplotlib.pyplot as plt
+from datetime import datetime, timezone
+import hashlib
+import time
+import gc
+import threading
+import gzip
+import json
 import io
 import os
 import sys
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-from project_standings import get_current_standings, run_monte_carlo_simulation
+from project_standings import (get_current_standings, run_monte_carlo_simulation, save_projections, simulation_inputs, map_values,
+                               LeagueConfig, PREMIER_LEAGUE, load_fixture_probabilities, simulate_leagues)
+from jobs import JobRunner, QueueFull
+from projection_history import ProjectionHistory
+from leverage import leverage_table
+from metrics import REGISTRY, timed
 
 app = Flask(__name__, template_folder='../frontend/templates', static_folder=None)
 app.secret_key = 'premier_league_predictor_secret_key' # Required for flash messages
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, 'data')
+# PREMPREDICTOR_DATA_DIR points the app at another copy of backend/data (e.g. load tests)
+DATA_DIR = os.environ.get("PREMPREDICTOR_DATA_DIR", os.path.join(BASE_DIR, 'data'))
+
+# Metrics served at /metrics (Prometheus text format, per worker process)
+REQUEST_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "Request latency by route", ["method", "route", "status"])
+CSV_LOAD = REGISTRY.histogram("csv_load_seconds", "Time to read and parse a data CSV (cache misses)", ["file"])
+CHART_RENDER = REGISTRY.histogram("chart_render_seconds", "Time to render a chart PNG", ["chart"])
+SIMULATION = REGISTRY.histogram("simulation_duration_seconds", "Time to run a simulation job, including saving", ["status"])
+SIMULATED_SEASONS = REGISTRY.counter("simulated_seasons_total", "Seasons simulated by finished simulation jobs")
+CACHE_LOOKUPS = REGISTRY.counter("csv_cache_lookups_total", "In-memory CSV cache lookups", ["file", "result"])
+
+# Simulations run in the background (see src/jobs.py) so they are not bound by the
+# gunicorn request timeout; one at a time per worker, at most MAX_ACTIVE_JOBS in flight
+# across all workers, and identical requests share one run.
+DEFAULT_SIMULATIONS = 1000
+MAX_SIMULATIONS = 100000
+MAX_ACTIVE_JOBS = 4
+# What-if simulations of custom league formats run inline, so they are kept small
+MAX_LEAGUE_SIMULATIONS = 20000
+MAX_LEAGUES = 10
+job_runner = JobRunner(max_workers=1, max_active=MAX_ACTIVE_JOBS)
+
+# In-memory copy of a parsed CSV from DATA_DIR, shared by all requests in this worker.
+# It is re-read only when the file changes on disk (mtime or size), so other workers'
+# simulations are picked up too, or when invalidate() is called (e.g. by /run/simulate).
+# The cached DataFrame is shared: callers must not modify it in place.
+# Subclasses can override parse() to cache other file types.
+class CsvCache:
+    def __init__(self, filename):
+        self.path = os.path.join(DATA_DIR, filename)
+        self.lock = threading.Lock()
+        self.data = None
+        self.stamp = None
+        self.version = None  # sha1 of the file contents the cached frame was parsed from
+        self.mtime = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # Returns the parsed file, or None if the file does not exist
+    def get(self):
+        return self.get_versioned()[0]
+
+    # Returns (parsed file, content hash), or (None, None) if the file does not exist
+    def get_versioned(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None, None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            filename = os.path.basename(self.path)
+            if self.data is not None and stamp == self.stamp:
+                self.hits += 1
+                CACHE_LOOKUPS.inc(file=filename, result="hit")
+                return self.data, self.version
+            self.misses += 1
+            CACHE_LOOKUPS.inc(file=filename, result="miss")
+            with timed(CSV_LOAD, file=filename):
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                self.data = self.parse(raw)
+            self.stamp = stamp
+            self.mtime = st.st_mtime
+            self.version = hashlib.sha1(raw).hexdigest()
+            return self.data, self.version
+
+    def parse(self, raw):
+        return pd.read_csv(io.BytesIO(raw))
+
+    def invalidate(self):
+        with self.lock:
+            self.data = None
+            self.stamp = None
+            self.invalidations += 1
+
+    def stats(self):
+        return {
+            "file": os.path.basename(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "version": self.version,
+        }
+
+standings_cache = CsvCache("projected_standings.csv")
+predictions_cache = CsvCache("upcoming_predictions.csv")
+pairs_cache = CsvCache("pair_probabilities.csv")
+
+# Simulation distributions saved by run_monte_carlo_simulation, turned into one ready-made
+# drill-down payload per team when the file is loaded, so team requests only look it up.
+class DistributionCache(CsvCache):
+    def parse(self, raw):
+        with np.load(io.BytesIO(raw)) as npz:
+            return build_team_drilldowns(npz)
+
+distributions_cache = DistributionCache("simulation_distributions.npz")
+
+# The fixture leverage arrays from the same file (see src/leverage.py), ranked per request
+LEVERAGE_KEYS = ("teams", "fixture_dates", "fixture_home", "fixture_away", "leverage_zones", "leverage", "zone_probs")
+
+class LeverageCache(CsvCache):
+    def parse(self, raw):
+        with np.load(io.BytesIO(raw)) as npz:
+            return {key: npz[key] for key in LEVERAGE_KEYS if key in npz.files}
+
+leverage_cache = LeverageCache("simulation_distributions.npz")
+
+# (home, away) -> probabilities, built once per version of pair_probabilities.csv
+pair_index = {"version": None, "pairs": {}}
+pair_index_lock = threading.Lock()
+
+# Rendered chart PNGs, keyed by chart name and holding the standings version they were
+# drawn from: each chart is rendered once per set of projections, not once per request.
+chart_cache = {}
+chart_lock = threading.Lock()
+
+# Request latency per route (the URL rule, e.g. /api/v1/teams/<team>, not the raw path)
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route, status=response.status_code)
+    return response
 
 @app.route('/styles/<path:filename>')
 def serve_styles(filename):
@@ -33,120 +174,628 @@ def serve_images(filename):
 @app.route('/')
 def index():
     # Load projected standings if available, otherwise run simulation
-    csv_path = os.path.join(DATA_DIR, "projected_standings.csv")
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-    else:
+    df = standings_cache.get()
+    if df is None:
         # Run simulation on the fly if no file exists
-        current = get_current_standings()
-        if current:
-            df = run_monte_carlo_simulation(current, num_simulations=1000)
-            df = df.sort_values("Projected Points", ascending=False)
-        else:
+        current = get_current_standings(DATA_DIR)
+        df = run_monte_carlo_simulation(current, num_simulations=1000, data_dir=DATA_DIR) if current else None
+        if df is None or df.empty:
             return "Error: Could not load data."
+        df = df.sort_values("Projected Points", ascending=False)
 
     # Convert to list of dicts for template
     standings = df.to_dict('records')
-    return render_template('index.html', standings=standings)
+    return render_template('index.html', standings=standings, job_id=request.args.get('job'))
+
+# Runs the Monte Carlo simulation and saves the projected standings (background job body).
+def simulate_standings(num_simulations, progress=None):
+    start = time.perf_counter()
+    try:
+        current = get_current_standings(DATA_DIR)
+        if not current:
+            raise RuntimeError("Could not get current standings.")
+        df, distributions = run_monte_carlo_simulation(current, num_simulations=num_simulations, progress=progress,
+                                                       return_distributions=True, data_dir=DATA_DIR)
+        if df.empty:
+            raise RuntimeError("upcoming_predictions.csv not found. Run the pipeline first.")
+        df = df.sort_values("Projected Points", ascending=False)
+
+        # Save projections (atomic rename, so other workers never read a partial file)
+        save_projections(df, DATA_DIR, distributions=distributions)
+        standings_cache.invalidate()
+        distributions_cache.invalidate()
+        leverage_cache.invalidate()
+        prerender_charts()
+    except Exception:
+        SIMULATION.observe(time.perf_counter() - start, status="failed")
+        raise
+    SIMULATION.observe(time.perf_counter() - start, status="done")
+    SIMULATED_SEASONS.inc(num_simulations)
+    return {
+        "simulations": num_simulations,
+        "version": standings_cache.version,
+        "standings": json.loads(df.to_json(orient="records")),
+    }
+
+# Identifies a simulation by its inputs: same data files and simulation count -> same run
+def simulation_key(num_simulations):
+    digest = hashlib.sha1(str(num_simulations).encode("utf-8"))
+    for path in simulation_inputs(DATA_DIR):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return "simulate-" + digest.hexdigest()[:20]
+
+def wants_json():
+    return request.is_json or request.accept_mimetypes.best == "application/json"
 
-# Triggers a new Monte Carlo simulation to update the projected standings.
-# It saves the results to a CSV file and redirects back to the index.
+# Starts a new Monte Carlo simulation as a background job and returns straight away.
+# JSON clients get 202 with the job id; the dashboard is redirected back to the index,
+# which polls the job and reloads when the new projections are saved.
+# A request with the same inputs as a simulation in flight (in any worker) joins that job,
+# and when too many jobs are in flight the request is rejected with 429.
 @app.route('/run/simulate', methods=['POST'])
 def run_simulate():
+    params = request.get_json(silent=True) or request.form
     try:
-        current = get_current_standings()
-        if current:
-            df = run_monte_carlo_simulation(current, num_simulations=1000)
-            df = df.sort_values("Projected Points", ascending=False)
-            
-            # Save projections
-            df.to_csv(os.path.join(DATA_DIR, "projected_standings.csv"), index=False)
-            flash("Simulation completed successfully!", "success")
-        else:
-            flash("Could not get current standings.", "error")
-    except Exception as e:
-        flash(f"Error during simulation: {str(e)}", "error")
-    return redirect(url_for('index'))
+        num_simulations = int(params.get("simulations", DEFAULT_SIMULATIONS))
+    except (TypeError, ValueError):
+        num_simulations = 0
+    if not 1 <= num_simulations <= MAX_SIMULATIONS:
+        message = f"simulations must be between 1 and {MAX_SIMULATIONS}"
+        if wants_json():
+            return jsonify({"error": message}), 400
+        flash(message, "error")
+        return redirect(url_for('index'))
 
-# Generates and returns a bar chart image showing the title probabilities for contending teams.
-@app.route('/plot/title_race')
-def plot_title_race():
     try:
-        csv_path = os.path.join(DATA_DIR, "projected_standings.csv")
-        if not os.path.exists(csv_path):
-            print(f"CSV not found at {csv_path}")
+        job_id, started = job_runner.submit("simulate", simulate_standings, num_simulations,
+                                            key=simulation_key(num_simulations))
+    except QueueFull as e:
+        if wants_json():
+            return jsonify({"error": str(e)}), 429, {"Retry-After": "30"}
+        flash(f"Server busy: {e}", "error")
+        return redirect(url_for('index'))
+
+    if wants_json():
+        return jsonify({"job_id": job_id, "started": started, "status_url": url_for('job_status', job_id=job_id)}), 202
+    if started:
+        flash("Simulation started, the view will update when it finishes.", "success")
+    else:
+        flash("An identical simulation is already running, following it.", "success")
+    return redirect(url_for('index', job=job_id))
+
+# Status of a background job: queued/running/done/failed, progress (0-1) and, once done,
+# its result.
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job)
+
+# Draws a horizontal bar chart of one probability column and returns it as PNG bytes
+def render_bar_chart(teams, column, color, xlabel, title, empty_text):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if teams.empty:
+        ax.text(0.5, 0.5, empty_text, ha='center', va='center')
+    else:
+        bars = ax.barh(teams["Team"], teams[column], color=color)
+        ax.set_xlabel(xlabel)
+        ax.set_title(title)
+
+        # Add labels
+        for bar in bars:
+            width = bar.get_width()
+            ax.text(width + 0.5, bar.get_y() + bar.get_height()/2, f'{width}%', ha='left', va='center')
+
+    plt.tight_layout()
+
+    img = io.BytesIO()
+    fig.savefig(img, format='png')
+    plt.close(fig) # Close the specific figure
+    return img.getvalue()
+
+# Title probabilities for contending teams (> 0.1% title chance)
+def render_title_race(df):
+    title_contenders = df[df["Title %"] > 0.1].sort_values("Title %", ascending=True)
+    return render_bar_chart(title_contenders, "Title %", 'skyblue', "Title Probability (%)",
+                            "Premier League Title Race Probabilities", 'No Title Contenders (>0.1%)')
+
+# Relegation probabilities for teams at risk (> 1% relegation chance)
+def render_relegation(df):
+    relegation_candidates = df[df["Relegation %"] > 1.0].sort_values("Relegation %", ascending=True)
+    return render_bar_chart(relegation_candidates, "Relegation %", 'salmon', "Relegation Probability (%)",
+                            "Relegation Battle Probabilities", 'No Relegation Candidates (>1%)')
+
+CHARTS = {
+    "title_race": render_title_race,
+    "relegation": render_relegation,
+}
+
+# Returns (standings version, PNG bytes) for a chart, rendering it only if the
+# standings changed since it was last drawn. Returns (None, None) without standings.
+def get_chart(name):
+    df, version = standings_cache.get_versioned()
+    if df is None:
+        return None, None
+    with chart_lock:
+        cached = chart_cache.get(name)
+        if cached and cached[0] == version:
+            return cached
+    with timed(CHART_RENDER, chart=name):
+        png = CHARTS[name](df)
+    with chart_lock:
+        chart_cache[name] = (version, png)
+    return version, png
+
+# Renders every chart for the current standings (called after a simulation)
+def prerender_charts():
+    for name in CHARTS:
+        get_chart(name)
+
+# Serves a cached chart with a strong ETag; browsers revalidate and get a 304 while the
+# projections are unchanged.
+def send_chart(name):
+    try:
+        version, png = get_chart(name)
+        if png is None:
             return "No data", 404
-        
-        df = pd.read_csv(csv_path)
-        print(f"Loaded CSV with {len(df)} rows")
-        
-        # Filter teams with > 0.1% title chance
-        title_contenders = df[df["Title %"] > 0.1].sort_values("Title %", ascending=True)
-        print(f"Title contenders: {len(title_contenders)}")
-        
-        if title_contenders.empty:
-            print("No title contenders found")
-            # Create a dummy plot saying "No Data"
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.text(0.5, 0.5, 'No Title Contenders (>0.1%)', ha='center', va='center')
-        else:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            bars = ax.barh(title_contenders["Team"], title_contenders["Title %"], color='skyblue')
-            ax.set_xlabel("Title Probability (%)")
-            ax.set_title("Premier League Title Race Probabilities")
-            
-            # Add labels
-            for bar in bars:
-                width = bar.get_width()
-                ax.text(width + 0.5, bar.get_y() + bar.get_height()/2, f'{width}%', ha='left', va='center')
-        
-        plt.tight_layout()
-        
-        img = io.BytesIO()
-        fig.savefig(img, format='png')
-        img.seek(0)
-        plt.close(fig) # Close the specific figure
-        return send_file(img, mimetype='image/png')
+        response = make_response(png)
+        response.mimetype = 'image/png'
+        response.set_etag(f"{name}-{version[:16]}")
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
-        print(f"Error in plot_title_race: {e}")
+        print(f"Error in plot {name}: {e}")
         return str(e), 500
 
-# Generates and returns a bar chart image showing the relegation probabilities for teams at risk.
+# Returns a bar chart image showing the title probabilities for contending teams.
+@app.route('/plot/title_race')
+def plot_title_race():
+    return send_chart("title_race")
+
+# Returns a bar chart image showing the relegation probabilities for teams at risk.
 @app.route('/plot/relegation')
 def plot_relegation():
+    return send_chart("relegation")
+
+# ---------------------------------------------------------
+# JSON API (v1)
+# ---------------------------------------------------------
+# Read-only views of the projections for the client-side charts and other consumers.
+# Every response carries an ETag (content hash of the source CSVs + query) and Last-Modified
+# (CSV mtime) so clients can revalidate with a 304, ?fields=a,b keeps only those columns,
+# and bodies are gzipped when the client accepts it.
+API_GZIP_MIN_BYTES = 500
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+@app.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({"error": e.message}), e.status
+
+# Parses ?fields= against the available columns; None means all of them
+def requested_fields(columns):
+    fields = request.args.get("fields")
+    if not fields:
+        return None
+    fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(columns)}")
+    return fields
+
+def records(df, fields=None):
+    if fields:
+        df = df[fields]
+    return json.loads(df.to_json(orient="records"))
+
+# Probabilities in upcoming_predictions.csv are stored as "28.10%" strings
+def prediction_records(df):
+    df = df.copy()
+    for col in ("Home Win %", "Draw %", "Away Win %"):
+        df[col] = df[col].astype(str).str.rstrip("%").astype(float)
+    return df
+
+def api_response(payload, versions, mtimes):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    gzipped = len(body) >= API_GZIP_MIN_BYTES and request.accept_encodings["gzip"] > 0
+    if gzipped:
+        body = gzip.compress(body, compresslevel=6)
+
+    # Versions of the source data plus the query, and the encoding (different bytes)
+    key = "|".join(versions + [request.full_path, "gzip" if gzipped else "identity"])
+    response = make_response(body)
+    response.mimetype = "application/json"
+    response.set_etag(hashlib.sha1(key.encode("utf-8")).hexdigest()[:20])
+    response.last_modified = datetime.fromtimestamp(max(mtimes), tz=timezone.utc)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    return response.make_conditional(request)
+
+def load_or_404(cache):
+    df, version = cache.get_versioned()
+    if df is None:
+        raise ApiError(f"{os.path.basename(cache.path)} not found. Run the pipeline first.", 404)
+    return df, version
+
+# Projected final standings, ranked by projected points
+@app.route('/api/v1/standings')
+def api_standings():
+    df, version = load_or_404(standings_cache)
+    fields = requested_fields(["Rank"] + list(df.columns))
+    df = df.sort_values("Projected Points", ascending=False)
+    df.insert(0, "Rank", range(1, len(df) + 1))
+    return api_response({"version": version, "standings": records(df, fields)},
+                        [version], [standings_cache.mtime])
+
+# Upcoming fixtures with outcome probabilities (in %); ?team= keeps one team's fixtures
+@app.route('/api/v1/predictions')
+def api_predictions():
+    df, version = load_or_404(predictions_cache)
+    fields = requested_fields(list(df.columns))
+    team = request.args.get("team")
+    if team:
+        team = resolve_team(team)
+        df = df[(df["Home"] == team) | (df["Away"] == team)]
+    return api_response({"version": version, "predictions": records(prediction_records(df), fields)},
+                        [version], [predictions_cache.mtime])
+
+# One team's projection and its upcoming fixtures
+@app.route('/api/v1/teams/<team>')
+def api_team(team):
+    standings, standings_version = load_or_404(standings_cache)
+    standings = standings.sort_values("Projected Points", ascending=False).reset_index(drop=True)
+    match = standings[standings["Team"] == resolve_team(team)]
+    if match.empty:
+        raise ApiError(f"Unknown team: {team}", 404)
+    name = match.iloc[0]["Team"]
+    projection = records(match)[0]
+    projection["Rank"] = int(match.index[0]) + 1
+
+    versions, mtimes = [standings_version], [standings_cache.mtime]
+    fixtures = []
+    predictions, predictions_version = predictions_cache.get_versioned()
+    if predictions is not None:
+        versions.append(predictions_version)
+        mtimes.append(predictions_cache.mtime)
+        mine = predictions[(predictions["Home"] == name) | (predictions["Away"] == name)]
+        fixtures = records(prediction_records(mine))
+    return api_response({"team": name, "projection": projection, "fixtures": fixtures}, versions, mtimes)
+
+def get_pair_index():
+    df, version = load_or_404(pairs_cache)
+    if pair_index["version"] != version:
+        with pair_index_lock:
+            if pair_index["version"] != version:
+                pairs = {(row["Home"], row["Away"]): row for row in records(df)}
+                pair_index.update(pairs=pairs, version=version)
+    return pair_index["pairs"], version
+
+# Head-to-head probabilities for any two current clubs, looked up in the pair table
+# precomputed by the prediction stage (no model call per request).
+@app.route('/api/predict')
+@app.route('/api/v1/predict')
+def api_predict():
+    home = request.args.get("home")
+    away = request.args.get("away")
+    if not home or not away:
+        raise ApiError("Both home and away are required, e.g. ?home=Arsenal&away=Chelsea")
+    home, away = resolve_team(home), resolve_team(away)
+    if home == away:
+        raise ApiError("home and away must be different teams")
+    pairs, version = get_pair_index()
+    prediction = pairs.get((home, away))
+    if prediction is None:
+        raise ApiError(f"No prediction for {home} vs {away}: both must be current Premier League clubs", 404)
+    return api_response(prediction, [version], [pairs_cache.mtime])
+
+# Builds (LeagueConfig, {team: points}, fixtures) from one league of a /api/v1/simulate/leagues
+# request. standings and fixtures default to the current Premier League data.
+def parse_league(spec):
+    if not isinstance(spec, dict):
+        raise ApiError("Each league must be an object")
+    name = str(spec.get("name", PREMIER_LEAGUE.name))
+    standings = spec.get("standings")
+    fixtures = spec.get("fixtures")
+    if standings is None:
+        current = get_current_standings(DATA_DIR)
+        if not current:
+            raise ApiError("Could not get current standings.", 404)
+        standings = {team: current[team]["Points"] for team in current}
+    if fixtures is None:
+        matches = load_fixture_probabilities(DATA_DIR)
+        if matches is None:
+            raise ApiError("upcoming_predictions.csv not found. Run the pipeline first.", 404)
+    else:
+        try:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                matches = [{"Home": f["home"], "Away": f["away"], "Date": f.get("date", ""),
+                            "Probs": np.asarray(f["probs"], dtype=float) / np.sum(f["probs"])} for f in fixtures]
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(f"{name}: fixtures must be objects with home, away and probs ([home win, draw, away win])")
+        if any(m["Probs"].shape != (3,) or not np.isfinite(m["Probs"]).all() or (m["Probs"] < 0).any() for m in matches):
+            raise ApiError(f"{name}: probs must be three non-negative numbers, not all zero")
     try:
-        csv_path = os.path.join(DATA_DIR, "projected_standings.csv")
-        if not os.path.exists(csv_path):
-            return "No data", 404
-        
-        df = pd.read_csv(csv_path)
-        # Filter teams with > 1% relegation chance
-        relegation_candidates = df[df["Relegation %"] > 1.0].sort_values("Relegation %", ascending=True)
-        
-        if relegation_candidates.empty:
-             fig, ax = plt.subplots(figsize=(10, 6))
-             ax.text(0.5, 0.5, 'No Relegation Candidates (>1%)', ha='center', va='center')
-        else:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            bars = ax.barh(relegation_candidates["Team"], relegation_candidates["Relegation %"], color='salmon')
-            ax.set_xlabel("Relegation Probability (%)")
-            ax.set_title("Relegation Battle Probabilities")
-            
-            # Add labels
-            for bar in bars:
-                width = bar.get_width()
-                ax.text(width + 0.5, bar.get_y() + bar.get_height()/2, f'{width}%', ha='left', va='center')
-        
-        plt.tight_layout()
-        
-        img = io.BytesIO()
-        fig.savefig(img, format='png')
-        img.seek(0)
-        plt.close(fig)
-        return send_file(img, mimetype='image/png')
-    except Exception as e:
-        print(f"Error in plot_relegation: {e}")
-        return str(e), 500
+        standings = {str(team): int(points) for team, points in standings.items()}
+        zones = {label: (int(first), int(last)) for label, (first, last) in spec.get("zones", PREMIER_LEAGUE.zones).items()}
+        config = LeagueConfig(name, teams=len(standings), games=int(spec.get("games", PREMIER_LEAGUE.games)), zones=zones)
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ApiError(f"{name}: invalid league format ({e})")
+    return config, standings, matches
+
+# What-if projections for one or more leagues with their own format (teams, games, zones),
+# simulated together in one batched pass. Nothing is saved.
+#   {"simulations": 2000, "leagues": [{"name": "...", "games": 46,
+#     "zones": {"Promotion": [1, 2], "Relegation": [22, 24]},
+#     "standings": {"Team": points, ...}, "fixtures": [{"home": ..., "away": ..., "probs": [h, d, a]}, ...]}]}
+@app.route('/api/v1/simulate/leagues', methods=['POST'])
+def api_simulate_leagues():
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict) or not isinstance(params.get("leagues"), list) or not params["leagues"]:
+        raise ApiError("Expected a JSON body with a non-empty leagues list")
+    if len(params["leagues"]) > MAX_LEAGUES:
+        raise ApiError(f"At most {MAX_LEAGUES} leagues per request")
+    try:
+        num_simulations = int(params.get("simulations", DEFAULT_SIMULATIONS))
+    except (TypeError, ValueError):
+        num_simulations = 0
+    if not 1 <= num_simulations <= MAX_LEAGUE_SIMULATIONS:
+        raise ApiError(f"simulations must be between 1 and {MAX_LEAGUE_SIMULATIONS}")
+
+    leagues = [parse_league(spec) for spec in params["leagues"]]
+    names = [config.name for config, _, _ in leagues]
+    if len(set(names)) != len(names):
+        raise ApiError("League names must be unique")
+    with timed(SIMULATION, status="inline"):
+        tables = simulate_leagues(leagues, num_simulations=num_simulations)
+    return jsonify({
+        "simulations": num_simulations,
+        "leagues": [{"name": name, "standings": records(tables[name].sort_values("Projected Points", ascending=False))}
+                    for name in names],
+    })
+
+# ---------------------------------------------------------
+# TEAM DRILL-DOWN
+# ---------------------------------------------------------
+# Value below which a share q of the simulations fall, from a points histogram
+def histogram_percentile(hist, q):
+    cumulative = np.cumsum(hist)
+    return int(np.searchsorted(cumulative, q * cumulative[-1]))
+
+# One payload per team from the saved distributions: final points histogram, finishing
+# position distribution and simulated outcomes of its remaining fixtures (all in %)
+def build_team_drilldowns(npz):
+    teams = [str(team) for team in npz["teams"]]
+    n = int(npz["num_simulations"])
+    points_hist = npz["points_hist"]
+    position_counts = npz["position_counts"]
+    outcome_counts = npz["outcome_counts"]
+    home, away, dates = npz["fixture_home"], npz["fixture_away"], npz["fixture_dates"]
+
+    drilldowns = {}
+    for t, team in enumerate(teams):
+        hist = points_hist[t]
+        played = np.nonzero(hist)[0]
+        low, high = int(played[0]), int(played[-1])
+
+        fixtures = []
+        for m in np.nonzero((home == team) | (away == team))[0]:
+            home_pct, draw_pct, away_pct = outcome_counts[m] / n * 100
+            at_home = home[m] == team
+            win_pct, loss_pct = (home_pct, away_pct) if at_home else (away_pct, home_pct)
+            fixtures.append({
+                "date": str(dates[m]),
+                "opponent": str(away[m] if at_home else home[m]),
+                "venue": "Home" if at_home else "Away",
+                "win_pct": round(float(win_pct), 1),
+                "draw_pct": round(float(draw_pct), 1),
+                "loss_pct": round(float(loss_pct), 1),
+                "most_likely": ["Win", "Draw", "Loss"][int(np.argmax([win_pct, draw_pct, loss_pct]))],
+            })
+
+        drilldowns[team] = {
+            "team": team,
+            "simulations": n,
+            "points": {
+                "mean": round(float((hist * np.arange(len(hist))).sum() / n), 1),
+                "p10": histogram_percentile(hist, 0.1),
+                "median": histogram_percentile(hist, 0.5),
+                "p90": histogram_percentile(hist, 0.9),
+                "histogram": [{"points": p, "pct": round(float(hist[p]) / n * 100, 2)} for p in range(low, high + 1)],
+            },
+            "positions": [{"position": r + 1, "pct": round(float(c) / n * 100, 2)} for r, c in enumerate(position_counts[t])],
+            "fixtures": fixtures,
+        }
+    return drilldowns
+
+def get_drilldown(team):
+    drilldowns, version = distributions_cache.get_versioned()
+    if drilldowns is None:
+        raise ApiError("simulation_distributions.npz not found. Run a simulation first.", 404)
+    drilldown = drilldowns.get(resolve_team(team))
+    if drilldown is None:
+        raise ApiError(f"Unknown team: {team}", 404)
+    return drilldown, version
+
+# Final points histogram, finishing position distribution and fixture outcomes for one team
+@app.route('/api/v1/teams/<team>/distribution')
+def api_team_distribution(team):
+    drilldown, version = get_drilldown(team)
+    return api_response(drilldown, [version], [distributions_cache.mtime])
+
+# ---------------------------------------------------------
+# FIXTURE LEVERAGE
+# ---------------------------------------------------------
+DEFAULT_LEVERAGE_LIMIT = 20
+
+# Remaining fixtures ranked by how much their result moves a zone's odds, from the last
+# simulation. ?zone=Title (default: every zone), ?team= ranks by that team's odds instead
+# of the most affected team's, ?limit= fixtures per zone. Swing and the per-outcome shifts
+# are in percentage points.
+@app.route('/api/v1/leverage')
+def api_leverage():
+    distributions, version = leverage_cache.get_versioned()
+    if distributions is None or "leverage" not in distributions:
+        raise ApiError("No fixture leverage in simulation_distributions.npz. Run a simulation first.", 404)
+    zones = [str(z) for z in distributions["leverage_zones"]]
+    zone = request.args.get("zone")
+    if zone is not None and zone not in zones:
+        raise ApiError(f"Unknown zone: {zone}. Available: {', '.join(zones)}")
+    team = request.args.get("team")
+    if team is not None:
+        team = resolve_team(team)
+        if team not in set(distributions["teams"].astype(str)):
+            raise ApiError(f"Unknown team: {request.args['team']}", 404)
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LEVERAGE_LIMIT))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ApiError("limit must be a positive integer")
+
+    ranked = {label: records(leverage_table(distributions, label, team).head(limit)) for label in ([zone] if zone else zones)}
+    return api_response({"version": version, "team": team, "zones": ranked}, [version], [leverage_cache.mtime])
+
+# ---------------------------------------------------------
+# PROJECTION TRENDS
+# ---------------------------------------------------------
+# Every saved projection is appended to data/history (see projection_history.py); the
+# store keeps a team -> rows index in memory and reads only the requested columns.
+history = ProjectionHistory(os.path.join(DATA_DIR, "history"))
+history_lock = threading.Lock()
+TREND_FIELDS = ["Projected Points", "Title %", "Top 4 %", "Relegation %"]
+
+# How a team's projection moved across runs, oldest first. ?team= is required;
+# ?fields=Title %,Relegation % picks the columns (default: points and the zone odds).
+@app.route('/api/v1/trend')
+def api_trend():
+    team = request.args.get("team")
+    if not team:
+        raise ApiError("team is required, e.g. ?team=Arsenal")
+    with history_lock:
+        columns = history.columns()
+        if not columns:
+            raise ApiError("No projection history yet. Run a simulation first.", 404)
+        fields = requested_fields(columns) or [f for f in TREND_FIELDS if f in columns]
+        name = resolve_team(team)
+        series = history.team_series(name, fields)
+        version = history.version()
+    if series is None:
+        raise ApiError(f"No projection history for {team}", 404)
+
+    runs = [{"run_time": datetime.fromtimestamp(t, tz=timezone.utc).isoformat(), "data_hash": h[:12],
+             **{f: series[f][i] for f in fields}}
+            for i, (t, h) in enumerate(zip(series["run_time"], series["data_hash"]))]
+    mtime = os.path.getmtime(os.path.join(history.path, "manifest.json"))
+    return api_response({"team": name, "runs": runs}, [version], [mtime])
+
+# Rendered team pages, keyed by (team, distributions version)
+team_pages = {}
+
+# Team drill-down page (rendered once per team and set of simulation results)
+@app.route('/teams/<team>')
+def team_page(team):
+    try:
+        drilldown, version = get_drilldown(team)
+    except ApiError as e:
+        return e.message, e.status
+    key = (drilldown["team"], version)
+    html = team_pages.get(key)
+    if html is None:
+        standings = standings_cache.get()
+        row = standings[standings["Team"] == drilldown["team"]] if standings is not None else None
+        projection = row.iloc[0].to_dict() if row is not None and not row.empty else None
+        max_pct = max(p["pct"] for p in drilldown["points"]["histogram"])
+        html = render_template('team.html', d=drilldown, projection=projection, max_pct=max_pct)
+        # Drop pages of older versions
+        for old_key in [k for k in team_pages if k[1] != version]:
+            team_pages.pop(old_key, None)
+        team_pages[key] = html
+    return html
+
+# Hit/miss counters of the in-memory standings cache and the cached chart versions (per worker process).
+@app.route('/cache/stats')
+def cache_stats():
+    stats = standings_cache.stats()
+    stats["predictions"] = predictions_cache.stats()
+    stats["pairs"] = pairs_cache.stats()
+    stats["distributions"] = distributions_cache.stats()
+    stats["leverage"] = leverage_cache.stats()
+    stats["charts"] = {name: version for name, (version, _) in chart_cache.items()}
+    return jsonify(stats)
+
+# ---------------------------------------------------------
+# PRELOADED ARTIFACTS
+# ---------------------------------------------------------
+# Loaded once at import. With `gunicorn --preload` (see Procfile) that import happens in
+# the master before forking, so all workers share these objects copy-on-write instead of
+# each loading its own copy. Request handlers only read them (filters and sorts return new
+# frames); the caches above reload only when the files on disk change.
+# The trained model is not among them: every request is served from files the pipeline
+# precomputed (the pair table covers all current clubs), so no handler calls the model.
+# Set PRELOAD_ARTIFACTS=0 to skip (everything is then loaded lazily on first use).
+artifacts = {"teams": {}, "teams_version": None}
+
+# Lower-cased team names and full-name aliases (e.g. "manchester united") -> name used
+# in the projections ("Manchester Utd"); built from the standings and predictions, so it
+# is rebuilt whenever either file changes (see resolve_team)
+def build_team_registry():
+    registry = {}
+    standings = standings_cache.get()
+    predictions = predictions_cache.get()
+    names = set(standings["Team"]) if standings is not None else set()
+    if predictions is not None:
+        names |= set(predictions["Home"]) | set(predictions["Away"])
+    for name in names:
+        registry[name.lower()] = name
+    for full_name, name in map_values.items():
+        if name in names:
+            registry[full_name.lower()] = name
+    return registry
+
+# The registry for the current standings and predictions (rebuilt when either changed on
+# disk, e.g. promoted clubs after a refresh)
+def team_registry():
+    versions = (standings_cache.get_versioned()[1], predictions_cache.get_versioned()[1])
+    if versions != artifacts["teams_version"]:
+        artifacts.update(teams=build_team_registry(), teams_version=versions)
+    return artifacts["teams"]
+
+def resolve_team(name):
+    return team_registry().get(name.lower()) or name
+
+def preload_artifacts():
+    start = time.perf_counter()
+    standings_cache.get()
+    predictions_cache.get()
+    if pairs_cache.get() is not None:
+        get_pair_index()
+    distributions_cache.get()
+    leverage_cache.get()
+    prerender_charts()
+    team_registry()
+    # Move everything loaded so far out of the collector's generations: later collections
+    # in the workers then do not touch (and so copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded artifacts in {time.perf_counter() - start:.2f}s "
+          f"(teams: {len(set(artifacts['teams'].values()))})")
+
+if os.environ.get("PRELOAD_ARTIFACTS", "1") != "0":
+    preload_artifacts()
+
+# Prometheus scrape endpoint
+@app.route('/metrics')
+def metrics():
+    return REGISTRY.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
 if __name__ == '__main__':
     app.run(debug=True)
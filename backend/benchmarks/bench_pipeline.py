@@ -0,0 +1,197 @@
+# Benchmarks of the pipeline stages on synthetic leagues of any size (see synthetic.py).
+#
+#     python backend/benchmarks/bench_pipeline.py
+#     python backend/benchmarks/bench_pipeline.py --teams 20,40 --seasons 3,6 --remaining 10,19
+#     python backend/benchmarks/bench_pipeline.py --compare backend/output/benchmarks/pipeline-<ts>.json
+#
+# For every combination of teams x seasons x remaining rounds a league is generated in a
+# temporary directory and these stages are timed on it:
+#   get_current_standings, train_model, predict_matches, run_monte_carlo_simulation
+# with wall time (best of --repeat), peak traced memory and a throughput figure per stage
+# (rows, fixtures or simulated matches per second).
+# Results are saved to output/benchmarks/pipeline-<timestamp>.json. With --compare, stages
+# that got slower than a previous run by more than --threshold are reported and the script
+# exits with status 1. A stage that raises marks its league failed (later stages are
+# skipped) and the script also exits with status 1.
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'src'))
+
+from synthetic import generate_league
+from project_standings import get_current_standings, run_monte_carlo_simulation, LeagueConfig
+from predict_future_matches import train_model, predict_matches
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'output', 'benchmarks')
+
+def int_list(value):
+    return [int(v) for v in value.split(",")]
+
+# Runs func `repeat` times; returns (last result, best seconds, peak traced MB of one run)
+def measure(func, repeat, verbose):
+    best = None
+    result = None
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    for i in range(repeat):
+        if i == 0:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with out:
+            result = func()
+        seconds = time.perf_counter() - start
+        if i == 0:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        # The first run is traced (slower), so it only counts when it is the only one
+        if repeat == 1 or i > 0:
+            best = seconds if best is None else min(best, seconds)
+    return result, best, peak / 1e6
+
+def stage_result(name, seconds, peak_mb, units, unit_name):
+    return {
+        "stage": name,
+        "seconds": round(seconds, 4),
+        "peak_mb": round(peak_mb, 2),
+        "throughput": round(units / seconds, 1) if seconds > 0 else None,
+        "throughput_unit": f"{unit_name}/s",
+    }
+
+def bench_league(teams, seasons, remaining, args):
+    results = []
+    with tempfile.TemporaryDirectory(prefix="synthetic-league-") as data_dir:
+        sizes = generate_league(data_dir, teams=teams, seasons=seasons, remaining_rounds=remaining, seed=args.seed)
+        fixtures = pd.read_csv(os.path.join(data_dir, "fixtures.csv"))
+
+        current, seconds, peak = measure(lambda: get_current_standings(data_dir), args.repeat, args.verbose)
+        results.append(stage_result("get_current_standings", seconds, peak, sizes["current_rows"], "rows"))
+
+        try:
+            trained, seconds, peak = measure(lambda: train_model(data_dir), args.repeat, args.verbose)
+            results.append(stage_result("train_model", seconds, peak, sizes["history_rows"], "rows"))
+
+            predictions, seconds, peak = measure(lambda: predict_matches(fixtures, *trained), args.repeat, args.verbose)
+            results.append(stage_result("predict_matches", seconds, peak, len(fixtures), "fixtures"))
+        except Exception as e:
+            # e.g. a pandas version the feature code does not support. The later stages are
+            # not timed: on anything but the real predictions they would not compare with
+            # other runs, so the whole league is marked failed.
+            print(f"  train/predict failed: {e}")
+            results.append({"stage": "train_model" if len(results) == 1 else "predict_matches", "error": str(e)})
+            return {**sizes, "stages": results, "error": str(e)}
+        predictions.to_csv(os.path.join(data_dir, "upcoming_predictions.csv"), index=False)
+
+        # Same zones as the Premier League, scaled to the league size
+        config = LeagueConfig(f"Synthetic {teams}", teams=teams, games=2 * (teams - 1),
+                              zones={"Title": (1, 1), "Top 4": (1, 4), "Relegation": (teams - 2, teams)})
+        _, seconds, peak = measure(
+            lambda: run_monte_carlo_simulation(current, num_simulations=args.simulations, data_dir=data_dir, config=config),
+            args.repeat, args.verbose)
+        results.append(stage_result("run_monte_carlo_simulation", seconds, peak,
+                                    args.simulations * len(predictions), "matches"))
+    return {**sizes, "stages": results}
+
+def league_key(league):
+    return (league["teams"], league["seasons"], league["remaining_rounds"])
+
+# Stages that got slower than in a previous results file by more than threshold (a ratio)
+def compare(previous_path, leagues, threshold):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {league_key(l): l for l in json.load(f)["leagues"]}
+    regressions = []
+    for league in leagues:
+        before = previous.get(league_key(league))
+        if before is None:
+            continue
+        before_stages = {s["stage"]: s for s in before["stages"] if "seconds" in s}
+        for stage in league["stages"]:
+            old = before_stages.get(stage["stage"])
+            if old is None or "seconds" not in stage:
+                continue
+            ratio = stage["seconds"] / old["seconds"] if old["seconds"] else 1.0
+            if ratio > 1 + threshold:
+                regressions.append({"league": league_key(league), "stage": stage["stage"],
+                                    "before_s": old["seconds"], "after_s": stage["seconds"], "ratio": round(ratio, 2)})
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline stage benchmarks on synthetic leagues")
+    parser.add_argument("--teams", type=int_list, default=[20], help="Comma-separated team counts")
+    parser.add_argument("--seasons", type=int_list, default=[6], help="Comma-separated season counts (incl. current)")
+    parser.add_argument("--remaining", type=int_list, default=[19], help="Comma-separated remaining round counts")
+    parser.add_argument("--simulations", type=int, default=1000, help="Monte Carlo simulations per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic leagues")
+    parser.add_argument("--compare", help="Previous results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show the stages' own output")
+    args = parser.parse_args()
+
+    leagues = []
+    for teams, seasons, remaining in itertools.product(args.teams, args.seasons, args.remaining):
+        print(f"Benchmarking {teams} teams, {seasons} seasons, {remaining} remaining rounds...")
+        leagues.append(bench_league(teams, seasons, remaining, args))
+
+    print("\n" + "="*86)
+    print(f"PIPELINE BENCHMARK ({args.simulations:,} simulations, best of {args.repeat})")
+    print("="*86)
+    print(f"{'league':<16}{'stage':<30}{'seconds':>10}{'peak MB':>10}{'throughput':>20}")
+    for league in leagues:
+        label = f"{league['teams']}t/{league['seasons']}s/{league['remaining_rounds']}r"
+        for stage in league["stages"]:
+            if "error" in stage:
+                print(f"{label:<16}{stage['stage']:<30}{'failed':>10}")
+                continue
+            print(f"{label:<16}{stage['stage']:<30}{stage['seconds']:>10.3f}{stage['peak_mb']:>10.1f}"
+                  f"{stage['throughput']:>12,.0f} {stage['throughput_unit']}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "config": {k: v for k, v in vars(args).items() if k not in ("compare", "verbose")},
+            "leagues": leagues,
+        }, f, indent=2)
+    print(f"\nResults saved to {out_path}")
+
+    failed = [league for league in leagues if "error" in league]
+    for league in failed:
+        print(f"FAILED {league_key(league)}: {league['error']}")
+
+    if args.compare:
+        regressions = compare(args.compare, leagues, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['league']} {r['stage']}: {r['before_s']:.3f}s -> {r['after_s']:.3f}s (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
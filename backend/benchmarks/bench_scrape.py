@@ -0,0 +1,213 @@
+# Offline benchmark of the scraping pipeline, replayed from recorded fbref pages.
+#
+# Record once against live fbref (pages are saved with their URLs):
+#     FBREF_MODE=record python backend/main.py --scrape
+#     FBREF_MODE=record python backend/src/scrape_prev.py
+# Then replay as often as needed, fully offline:
+#     python backend/benchmarks/bench_scrape.py --recordings backend/output/recordings
+#
+# Runs scrape_current_season, get_upcoming_fixtures and scrape_previous_seasons against
+# the recordings, writes their CSVs to a temporary directory (the real data is untouched)
+# and reports pages per second and total pipeline time.
+#
+# The lean browser profile (see browser.py) only matters against live fbref, so it is
+# compared separately, online:
+#     python backend/benchmarks/bench_scrape.py --lean-compare --repeat 3
+# Chrome is started once with the full profile and once with the lean one; each loads the
+# standings and schedule pages --repeat times and reports per profile: seconds until the
+# table is in the DOM, requests, transferred bytes, scripts loaded (and blocked), JS heap,
+# and the resident memory of the whole Chrome process tree (Linux).
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BACKEND_DIR, 'src'))
+
+import page_store
+import browser
+from browser import get_driver
+from fbref import FBREF_URL, SCHEDULE_URL
+from scrape_future import scrape_current_season
+from scrape_prev import scrape_previous_seasons
+from predict_future_matches import get_upcoming_fixtures
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'output', 'benchmarks')
+
+LEAN_COMPARE_PAGES = [
+    (f"{FBREF_URL}/en/comps/9/Premier-League-Stats", "table.stats_table"),
+    (SCHEDULE_URL, "table[id^='sched_']"),
+]
+
+# Times one pipeline step and counts the recorded pages it was served
+def run_step(name, func, verbose):
+    driver = get_driver()
+    served, missing = driver.pages_served, driver.pages_missing
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with out:
+        func()
+    seconds = time.perf_counter() - start
+    pages = driver.pages_served - served
+    return {
+        "step": name,
+        "seconds": round(seconds, 4),
+        "pages": pages,
+        "missing_pages": driver.pages_missing - missing,
+        "pages_per_s": round(pages / seconds, 2) if seconds > 0 else None,
+    }
+
+# Resident memory in MB of a process and all its descendants, from /proc (Linux only)
+def tree_rss_mb(pid):
+    total, pending = 0.0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0) / 1024
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending += [int(child) for child in f.read().split()]
+        except FileNotFoundError:
+            continue
+    return round(total, 1)
+
+# What the browser loaded for the current page (Resource Timing API)
+PAGE_METRICS_JS = """
+var nav = performance.getEntriesByType('navigation')[0] || {};
+var resources = performance.getEntriesByType('resource');
+var bytes = resources.reduce(function (sum, r) { return sum + (r.transferSize || 0); }, nav.transferSize || 0);
+return {
+    requests: resources.length + 1,
+    kb: bytes / 1024,
+    scripts: resources.filter(function (r) { return r.initiatorType === 'script'; }).length,
+    js_heap_mb: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : null
+};
+"""
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 2) if values else None
+
+# Loads the live pages with the full and the lean profile; returns one summary per profile
+def lean_compare(args):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    profiles = []
+    for lean in (False, True):
+        browser.quit_driver()
+        driver = get_driver(lean=lean)
+        label = "lean" if lean else "full"
+        print(f"Loading {len(LEAN_COMPARE_PAGES)} pages x {args.repeat} with the {label} profile...")
+        pages = []
+        for _ in range(args.repeat):
+            for url, selector in LEAN_COMPARE_PAGES:
+                start = time.perf_counter()
+                try:
+                    driver.get(url)
+                    WebDriverWait(driver, 60).until(lambda d: d.find_elements(By.CSS_SELECTOR, selector))
+                    ok = True
+                except TimeoutException:
+                    ok = False
+                seconds = time.perf_counter() - start
+                pages.append({"url": url, "ok": ok, "seconds": round(seconds, 3), **driver.execute_script(PAGE_METRICS_JS)})
+                # Be polite to fbref between loads
+                time.sleep(args.gap)
+        profiles.append({
+            "profile": label,
+            "pages": pages,
+            "failed": sum(not p["ok"] for p in pages),
+            "seconds": mean([p["seconds"] for p in pages]),
+            "requests": mean([p["requests"] for p in pages]),
+            "kb": mean([p["kb"] for p in pages]),
+            "scripts": mean([p["scripts"] for p in pages]),
+            "js_heap_mb": mean([p["js_heap_mb"] for p in pages]),
+            "chrome_rss_mb": tree_rss_mb(driver.service.process.pid) if sys.platform.startswith("linux") else None,
+            "script_filter": browser.script_filter_counts(),
+        })
+    browser.quit_driver()
+
+    print("\n" + "="*78)
+    print(f"LEAN PROFILE COMPARISON (live fbref, {args.repeat} x {len(LEAN_COMPARE_PAGES)} pages, means per page)")
+    print("="*78)
+    print(f"{'Profile':<9}{'Seconds':>9}{'Requests':>10}{'KB':>10}{'Scripts':>9}{'Blocked':>9}{'JS heap MB':>12}{'Chrome MB':>11}")
+    for p in profiles:
+        blocked = p["script_filter"]["blocked"] if p["script_filter"] else 0
+        print(f"{p['profile']:<9}{p['seconds'] or 0:>9.2f}{p['requests'] or 0:>10.1f}{p['kb'] or 0:>10.0f}{p['scripts'] or 0:>9.1f}"
+              f"{blocked:>9}{p['js_heap_mb'] or 0:>12.1f}{p['chrome_rss_mb'] or 0:>11.0f}")
+    for p in profiles:
+        if p["failed"]:
+            print(f"{p['profile']}: {p['failed']} page(s) did not show their table within 60s (Cloudflare?)")
+    return profiles
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scrape benchmark (replays recorded pages)")
+    parser.add_argument("--recordings", default=page_store.DEFAULT_RECORDINGS_DIR, help="Directory written by FBREF_MODE=record")
+    parser.add_argument("--seasons", type=int, default=6, help="Number of past seasons for scrape_previous_seasons")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs")
+    parser.add_argument("--verbose", action="store_true", help="Show the scrapers' own output")
+    parser.add_argument("--lean-compare", action="store_true", help="Compare the full and lean browser profiles on live fbref instead")
+    parser.add_argument("--gap", type=float, default=3.0, help="Seconds between live page loads (--lean-compare)")
+    args = parser.parse_args()
+
+    if args.lean_compare:
+        if page_store.replaying():
+            sys.exit("--lean-compare loads live pages; unset FBREF_MODE=replay")
+        profiles = lean_compare(args)
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out_path = os.path.join(RESULTS_DIR, f"lean-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"repeat": args.repeat, "profiles": profiles}, f, indent=2)
+        print(f"\nSaved results to {out_path}")
+        return
+
+    if not os.path.exists(os.path.join(args.recordings, "index.json")):
+        print(f"No recordings found in {args.recordings}. Record a run first with FBREF_MODE=record.")
+        return
+    page_store.set_mode("replay", args.recordings)
+    years = tuple(range(2025, 2025 - args.seasons, -1))
+
+    runs = []
+    for i in range(args.repeat):
+        with tempfile.TemporaryDirectory() as data_dir:
+            steps = [
+                run_step("scrape_current_season", lambda: scrape_current_season(data_dir=data_dir), args.verbose),
+                run_step("get_upcoming_fixtures", lambda: get_upcoming_fixtures(use_cache=False, data_dir=data_dir), args.verbose),
+                run_step("scrape_previous_seasons", lambda: scrape_previous_seasons(years, data_dir=data_dir), args.verbose),
+            ]
+        total_s = sum(s["seconds"] for s in steps)
+        total_pages = sum(s["pages"] for s in steps)
+        runs.append({
+            "run": i + 1,
+            "steps": steps,
+            "total_s": round(total_s, 4),
+            "total_pages": total_pages,
+            "pages_per_s": round(total_pages / total_s, 2) if total_s > 0 else None,
+        })
+
+    print("\n" + "="*60)
+    print(f"OFFLINE SCRAPE BENCHMARK ({args.repeat} runs, {len(page_store.get_store().index)} recorded pages)")
+    print("="*60)
+    print(f"{'Step':<26} {'Pages':>6} {'Best s':>9} {'Pages/s':>9} {'Missing':>8}")
+    for j, step in enumerate(runs[0]["steps"]):
+        best = min(runs, key=lambda r: r["steps"][j]["seconds"])["steps"][j]
+        print(f"{step['step']:<26} {best['pages']:>6} {best['seconds']:>9.3f} {best['pages_per_s'] or 0:>9.1f} {best['missing_pages']:>8}")
+    best_run = min(runs, key=lambda r: r["total_s"])
+    print(f"{'Total pipeline':<26} {best_run['total_pages']:>6} {best_run['total_s']:>9.3f} {best_run['pages_per_s'] or 0:>9.1f}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"scrape-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"recordings": args.recordings, "seasons": args.seasons, "runs": runs}, f, indent=2)
+    print(f"\nSaved results to {out_path}")
+
+if __name__ == "__main__":
+    main()
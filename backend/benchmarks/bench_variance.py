@@ -0,0 +1,104 @@
+# Standard error per CPU-second of the simulation's variance reduction modes.
+#
+#     python backend/benchmarks/bench_variance.py
+#     python backend/benchmarks/bench_variance.py --simulations 2000 --replications 100
+#
+# Every sampling mode (plain, antithetic, stratified, sobol), with and without control
+# variates, projects the current table (data/) --replications times with different seeds.
+# The standard error of each team's zone probabilities is their spread across those runs:
+# quasi-random runs are not made of independent seasons, so one run's own spread would
+# overstate their error. Reported per mode:
+#   se          root mean variance of all team x zone probabilities (percentage points)
+#   cpu_s       CPU seconds of one run
+#   efficiency  1 / (se^2 x cpu_s) relative to plain sampling: how many times fewer
+#               CPU-seconds the mode needs for the same error
+# Results are saved to output/benchmarks/variance-<timestamp>.json.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BACKEND_DIR, 'src'))
+
+from project_standings import get_current_standings, run_monte_carlo_simulation, SAMPLING_MODES, DATA_DIR, PREMIER_LEAGUE
+from bench_pipeline import git_commit
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'output', 'benchmarks')
+
+# Zone probabilities (teams x zones, in %) and CPU seconds of every replication
+def replicate(current, sampling, control_variates, args):
+    zones = [f"{label} %" for label in PREMIER_LEAGUE.zones]
+    runs, cpu = [], []
+    for r in range(args.replications):
+        rng = np.random.default_rng([args.seed, r])
+        start = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            table = run_monte_carlo_simulation(current, num_simulations=args.simulations, data_dir=args.data_dir,
+                                               sampling=sampling, control_variates=control_variates, rng=rng)
+        cpu.append(time.process_time() - start)
+        runs.append(table.sort_values("Team")[zones].to_numpy(dtype=float))
+    return np.stack(runs), np.array(cpu)
+
+def main():
+    parser = argparse.ArgumentParser(description="Variance reduction benchmark of the Monte Carlo simulation")
+    parser.add_argument("--simulations", type=int, default=1000, help="Simulated seasons per run")
+    parser.add_argument("--replications", type=int, default=50, help="Runs per mode (the standard error is their spread)")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed of the replications")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the results and upcoming_predictions.csv")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        current = get_current_standings(args.data_dir)
+    if not current:
+        sys.exit(f"No current standings in {args.data_dir}")
+    # Imports and first-call setup (e.g. scipy's qmc) are not part of the timings
+    for sampling in SAMPLING_MODES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_monte_carlo_simulation(current, num_simulations=10, data_dir=args.data_dir, sampling=sampling)
+
+    modes = []
+    for sampling in SAMPLING_MODES:
+        for control_variates in (False, True):
+            label = sampling + (" + cv" if control_variates else "")
+            print(f"Running {label} ({args.replications} x {args.simulations:,} simulations)...")
+            probs, cpu = replicate(current, sampling, control_variates, args)
+            variance = probs.var(axis=0, ddof=1)
+            modes.append({
+                "sampling": sampling,
+                "control_variates": control_variates,
+                "se": round(float(np.sqrt(variance.mean())), 4),
+                "max_se": round(float(np.sqrt(variance.max())), 4),
+                "cpu_s": round(float(cpu.mean()), 5),
+                "work": float(variance.mean() * cpu.mean()),
+            })
+
+    plain = modes[0]["work"]
+    print("\n" + "="*70)
+    print(f"VARIANCE REDUCTION ({args.simulations:,} simulations, {args.replications} replications)")
+    print("="*70)
+    print(f"{'mode':<22}{'se (pp)':>10}{'max se':>10}{'cpu s':>10}{'efficiency':>14}")
+    for mode in modes:
+        mode["efficiency"] = round(plain / mode.pop("work"), 2) if plain else None
+        label = mode["sampling"] + (" + cv" if mode["control_variates"] else "")
+        print(f"{label:<22}{mode['se']:>10.3f}{mode['max_se']:>10.3f}{mode['cpu_s']:>10.4f}{mode['efficiency']:>13.2f}x")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"variance-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": git_commit(),
+            "config": {k: v for k, v in vars(args).items() if k != "data_dir"},
+            "modes": modes,
+        }, f, indent=2)
+    print(f"\nResults saved to {out_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Worker memory and cold-start latency of the web app under gunicorn, with and without
+# --preload (shared artifacts loaded once in the master, see app.py).
+#
+#     python backend/benchmarks/bench_workers.py --workers 4
+#
+# For each mode a gunicorn server is started on a local port and measured:
+#   - ready_s        time from launch until the first successful API response
+#   - first_req_ms   latency of the first request to each page/endpoint
+#   - worker memory  RSS, PSS and USS per worker from /proc/<pid>/smaps_rollup (Linux);
+#                    PSS/USS show how much memory is shared vs private after the fork
+# Results are printed and saved to output/benchmarks/workers-<timestamp>.json.
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'output', 'benchmarks')
+
+PATHS = ["/api/v1/standings", "/api/v1/predictions", "/plot/title_race", "/"]
+
+def get(url, timeout=5):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+# Memory of one process in MB, from /proc (Linux only)
+def process_memory(pid):
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                    memory[parts[0][:-1]] = int(parts[1]) / 1024
+    except FileNotFoundError:
+        return None
+    return {
+        "rss_mb": round(memory.get("Rss", 0), 1),
+        "pss_mb": round(memory.get("Pss", 0), 1),
+        "uss_mb": round(memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0), 1),
+    }
+
+def worker_pids(master_pid):
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+def measure(preload, workers, port, timeout):
+    cmd = [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+           "--timeout", "120", "backend.app:app"]
+    if preload:
+        cmd.insert(3, "--preload")
+    base = f"http://127.0.0.1:{port}"
+
+    start = time.perf_counter()
+    server = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready_s = None
+        while time.perf_counter() - start < timeout:
+            try:
+                get(base + PATHS[0], timeout=1)
+                ready_s = time.perf_counter() - start
+                break
+            except OSError:
+                time.sleep(0.05)
+        if ready_s is None:
+            raise RuntimeError(f"gunicorn did not answer within {timeout}s")
+
+        # Give every worker time to boot, then hit each path once per worker
+        time.sleep(1)
+        first_req_ms = {path: round(get(base + path), 1) for path in PATHS}
+        for _ in range(workers * 2):
+            for path in PATHS:
+                get(base + path)
+
+        memory = [m for m in (process_memory(pid) for pid in worker_pids(server.pid)) if m]
+        return {
+            "preload": preload,
+            "workers": workers,
+            "ready_s": round(ready_s, 3),
+            "first_req_ms": first_req_ms,
+            "worker_memory": memory,
+            "master_memory": process_memory(server.pid),
+            "total_pss_mb": round(sum(m["pss_mb"] for m in memory), 1),
+            "total_uss_mb": round(sum(m["uss_mb"] for m in memory), 1),
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description="gunicorn worker memory and cold-start benchmark")
+    parser.add_argument("--workers", type=int, default=4, help="Number of gunicorn workers")
+    parser.add_argument("--port", type=int, default=8765, help="Local port to bind")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for the server to start")
+    args = parser.parse_args()
+
+    results = [measure(preload, args.workers, args.port, args.timeout) for preload in (False, True)]
+
+    print("\n" + "="*72)
+    print(f"GUNICORN WORKERS ({args.workers} workers)")
+    print("="*72)
+    print(f"{'mode':<12}{'ready':>9}{'PSS total':>12}{'USS total':>12}{'USS/worker':>12}")
+    for r in results:
+        per_worker = r["total_uss_mb"] / max(1, len(r["worker_memory"]))
+        print(f"{'preload' if r['preload'] else 'no preload':<12}{r['ready_s']:>8.2f}s"
+              f"{r['total_pss_mb']:>10.1f}MB{r['total_uss_mb']:>10.1f}MB{per_worker:>10.1f}MB")
+    print("\nFirst request latency (ms):")
+    for path in PATHS:
+        print(f"  {path:<24}" + "".join(f"{r['first_req_ms'][path]:>10.1f}" for r in results))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"workers-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"workers": args.workers, "results": results}, f, indent=2)
+    print(f"\nResults saved to {out_path}")
+
+if __name__ == "__main__":
+    main()
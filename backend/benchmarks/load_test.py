@@ -0,0 +1,226 @@
+# Load test of the web app: starts backend.app:app under gunicorn with a given worker
+# config and drives it with a mixed traffic profile from concurrent clients.
+#
+#     python backend/benchmarks/load_test.py --workers 4 --concurrency 16 --duration 30
+#     python backend/benchmarks/load_test.py --worker-class gthread --threads 4 --preload
+#     python backend/benchmarks/load_test.py --url http://127.0.0.1:5000   # existing server
+#
+# The server runs against a temporary copy of backend/data (PREMPREDICTOR_DATA_DIR), so
+# simulations started by the test never touch the real projections.
+#
+# Reports throughput, p50/p95/p99 latency and error rate per route (429 from the
+# simulation queue limit is counted as "rejected", not as an error). Results are saved to
+# output/benchmarks/load-<timestamp>.json, so runs can be compared across changes.
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'output', 'benchmarks')
+
+# name -> (method, path, JSON body)
+ROUTES = {
+    "index": ("GET", "/", None),
+    "title_race": ("GET", "/plot/title_race", None),
+    "relegation": ("GET", "/plot/relegation", None),
+    "standings": ("GET", "/api/v1/standings", None),
+    "team": ("GET", "/api/v1/teams/Arsenal/distribution", None),
+    "predict": ("GET", "/api/predict?home=Arsenal&away=Chelsea", None),
+    "simulate": ("POST", "/run/simulate", {"simulations": 200}),
+}
+
+# Relative weights: mostly page views and charts, the odd simulation
+DEFAULT_PROFILE = "index=5,title_race=3,relegation=3,standings=4,team=2,predict=2,simulate=1"
+
+def parse_profile(profile):
+    weights = {}
+    for item in profile.split(","):
+        name, weight = item.split("=")
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route '{name}' in profile. Available: {', '.join(ROUTES)}")
+        weights[name] = float(weight)
+    return weights
+
+@contextmanager
+def gunicorn_server(args, data_dir):
+    cmd = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{args.port}",
+           "--workers", str(args.workers), "--worker-class", args.worker_class,
+           "--threads", str(args.threads), "--timeout", "120"]
+    if args.preload:
+        cmd.append("--preload")
+    cmd.append("backend.app:app")
+    env = dict(os.environ, PREMPREDICTOR_DATA_DIR=data_dir)
+
+    server = subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.perf_counter() + args.startup_timeout
+        while True:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=1)
+                conn.request("GET", "/api/v1/standings")
+                conn.getresponse().read()
+                break
+            except OSError:
+                if time.perf_counter() > deadline or server.poll() is not None:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{args.port}"
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+# One client: keeps a connection open and sends weighted-random requests until the deadline
+def client(base_url, weights, deadline, seed, samples, lock, timeout):
+    url = urlparse(base_url)
+    rng = random.Random(seed)
+    names = list(weights)
+    cum_weights = np.cumsum([weights[n] for n in names]).tolist()
+    conn = None
+    local = []
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, cum_weights=cum_weights)[0]
+        method, path, body = ROUTES[name]
+        if conn is None:
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=timeout)
+        start = time.perf_counter()
+        try:
+            payload = json.dumps(body) if body is not None else None
+            headers = {"Content-Type": "application/json", "Accept": "application/json"} if body is not None else {}
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = None
+            conn.close()
+            conn = None
+        local.append((name, time.perf_counter() - start, status))
+    if conn is not None:
+        conn.close()
+    with lock:
+        samples.extend(local)
+
+def summarize(samples, seconds):
+    routes = {}
+    for name in sorted({s[0] for s in samples}):
+        latencies = np.array([s[1] for s in samples if s[0] == name]) * 1000
+        statuses = [s[2] for s in samples if s[0] == name]
+        errors = sum(1 for st in statuses if st is None or (st >= 400 and st != 429))
+        routes[name] = {
+            "requests": len(statuses),
+            "rps": round(len(statuses) / seconds, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "errors": errors,
+            "rejected": statuses.count(429),
+            "error_rate": round(errors / len(statuses), 4),
+        }
+    latencies = np.array([s[1] for s in samples]) * 1000
+    errors = sum(r["errors"] for r in routes.values())
+    total = {
+        "requests": len(samples),
+        "rps": round(len(samples) / seconds, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(samples) else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2) if len(samples) else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(samples) else None,
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else None,
+    }
+    return routes, total
+
+def run_load(base_url, weights, args):
+    samples = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=client, args=(base_url, weights, deadline, args.seed + i, samples, lock, args.request_timeout))
+               for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the Flask dashboard under gunicorn")
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--worker-class", default="sync", help="gunicorn worker class (sync, gthread, ...)")
+    parser.add_argument("--threads", type=int, default=1, help="Threads per worker (gthread)")
+    parser.add_argument("--preload", action="store_true", help="Start gunicorn with --preload")
+    parser.add_argument("--port", type=int, default=8766, help="Local port for the started server")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of traffic")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Traffic mix as route=weight,... "
+                        f"(routes: {', '.join(ROUTES)})")
+    parser.add_argument("--simulations", type=int, default=200, help="Simulations per /run/simulate request")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the traffic mix")
+    parser.add_argument("--request-timeout", type=float, default=130, help="Client timeout per request (s)")
+    parser.add_argument("--startup-timeout", type=float, default=60, help="Seconds to wait for gunicorn to start")
+    args = parser.parse_args()
+
+    weights = parse_profile(args.profile)
+    ROUTES["simulate"] = ("POST", "/run/simulate", {"simulations": args.simulations})
+
+    if args.url:
+        samples, seconds = run_load(args.url, weights, args)
+    else:
+        data_dir = tempfile.mkdtemp(prefix="load-test-data-")
+        try:
+            shutil.copytree(os.path.join(BACKEND_DIR, 'data'), data_dir, dirs_exist_ok=True)
+            with gunicorn_server(args, data_dir) as base_url:
+                samples, seconds = run_load(base_url, weights, args)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    routes, total = summarize(samples, seconds)
+
+    print("\n" + "="*92)
+    print(f"LOAD TEST ({args.url or f'{args.workers} x {args.worker_class} workers, {args.threads} threads'}"
+          f"{', preload' if args.preload and not args.url else ''}; {args.concurrency} clients, {seconds:.1f}s)")
+    print("="*92)
+    print(f"{'route':<12}{'requests':>10}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}{'rejected':>10}")
+    for name, r in routes.items():
+        print(f"{name:<12}{r['requests']:>10}{r['rps']:>9.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['errors']:>9}{r['rejected']:>10}")
+    if total["requests"]:
+        print(f"{'total':<12}{total['requests']:>10}{total['rps']:>9.1f}{total['p50_ms']:>10.1f}{total['p95_ms']:>10.1f}"
+              f"{total['p99_ms']:>10.1f}{total['errors']:>9}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": git_commit(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("startup_timeout", "request_timeout")},
+            "seconds": round(seconds, 2),
+            "total": total,
+            "routes": routes,
+        }, f, indent=2)
+    print(f"\nResults saved to {out_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Synthetic league generator for the benchmarks: match histories and fixture lists of any
+# size, in the same CSV layout as the scraped data, so every pipeline stage runs on them.
+#
+#     generate_league(out_dir, teams=20, seasons=6, remaining_rounds=19)
+#
+# writes to out_dir:
+#   matches_data.csv         past seasons (full double round robins) + the played part of
+#                            the current season, one row per team per match
+#   future_matches_2025.csv  the played part of the current season (2025)
+#   fixtures.csv             the remaining fixtures of the current season
+# Team strengths are fixed per team, so the data has signal for the model to learn.
+
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+CURRENT_SEASON = 2025
+
+def team_names(n):
+    return [f"Team {i + 1:02d}" for i in range(n)]
+
+# Double round robin (circle method): 2 * (n - 1) rounds of n / 2 (home, away) pairs
+def double_round_robin(teams):
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is not None and away is not None:
+                pairs.append((home, away) if r % 2 == 0 else (away, home))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds + [[(away, home) for home, away in pairs] for pairs in rounds]
+
+def _match_rows(rng, strengths, season, round_no, match_date, home, away):
+    # Goals are Poisson with rates from attack/defence strength plus home advantage
+    home_rate = np.exp(0.25 + 0.3 * (strengths[home] - strengths[away]))
+    away_rate = np.exp(0.05 + 0.3 * (strengths[away] - strengths[home]))
+    goals = {home: rng.poisson(home_rate), away: rng.poisson(away_rate)}
+    kickoff = rng.choice(["12:30", "15:00", "17:30", "20:00"])
+    rows = []
+    for team, opponent, venue in ((home, away, "Home"), (away, home, "Away")):
+        gf, ga = goals[team], goals[opponent]
+        shots = int(rng.poisson(9 + 3 * gf))
+        on_target = min(shots, int(rng.poisson(2 + gf)))
+        pk_attempted = int(rng.random() < 0.12)
+        rows.append({
+            "date": match_date.isoformat(),
+            "time": kickoff,
+            "competition": "Premier League",
+            "round": f"Matchweek {round_no}",
+            "day": match_date.strftime("%a"),
+            "venue": venue,
+            "result": "W" if gf > ga else ("D" if gf == ga else "L"),
+            "goals for": gf,
+            "goals against": ga,
+            "opponent": opponent,
+            "shots total": shots,
+            "shots on target": on_target,
+            "average shot distance": round(float(rng.normal(17, 2)), 1),
+            "free kicks": int(rng.poisson(0.5)),
+            "penalty kicks scored": pk_attempted * int(rng.random() < 0.75),
+            "penalty kicks attempted": pk_attempted,
+            "season": season,
+            "team": team,
+        })
+    return rows
+
+# Writes a synthetic league to out_dir and returns its sizes
+def generate_league(out_dir, teams=20, seasons=6, remaining_rounds=19, seed=0):
+    rng = np.random.default_rng(seed)
+    names = team_names(teams)
+    strengths = dict(zip(names, rng.normal(0, 1, teams)))
+    total_rounds = 2 * (teams - 1 + teams % 2)
+    remaining_rounds = min(remaining_rounds, total_rounds)
+
+    past, current, fixtures = [], [], []
+    for season in range(CURRENT_SEASON - seasons + 1, CURRENT_SEASON + 1):
+        # Order of the fixtures differs from season to season
+        order = list(names)
+        rng.shuffle(order)
+        start = date(season, 8, 16)
+        for r, pairs in enumerate(double_round_robin(order)):
+            match_date = start + timedelta(days=7 * r)
+            for home, away in pairs:
+                if season == CURRENT_SEASON and r >= total_rounds - remaining_rounds:
+                    fixtures.append({"date": match_date.isoformat(), "home_team": home, "away_team": away})
+                else:
+                    rows = _match_rows(rng, strengths, season, r + 1, match_date, home, away)
+                    (current if season == CURRENT_SEASON else past).extend(rows)
+
+    os.makedirs(out_dir, exist_ok=True)
+    pd.DataFrame(past + current).to_csv(os.path.join(out_dir, "matches_data.csv"), index=False)
+    pd.DataFrame(current).to_csv(os.path.join(out_dir, "future_matches_2025.csv"), index=False)
+    pd.DataFrame(fixtures, columns=["date", "home_team", "away_team"]).to_csv(os.path.join(out_dir, "fixtures.csv"), index=False)
+    return {
+        "teams": teams,
+        "seasons": seasons,
+        "remaining_rounds": remaining_rounds,
+        "history_rows": len(past) + len(current),
+        "current_rows": len(current),
+        "fixtures": len(fixtures),
+    }
@@ -6,83 +6,209 @@ import pandas as pd
 # Add src to path so we can import modules
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from scrape_future import scrape_current_season
-from predict_future_matches import get_upcoming_fixtures, train_model, predict_matches
-from project_standings import get_current_standings, run_monte_carlo_simulation
+from scrape_future import scrape_current_season, refresh_results, RESULTS_FILE
+from predict_future_matches import (get_upcoming_fixtures, build_features, fit_model, predict_matches, predict_all_pairs, save_pair_table,
+                                    predict_tree_probabilities, save_tree_probabilities)
+from project_standings import (get_current_standings, run_monte_carlo_simulation, save_projections, results_path,
+                               UNCERTAINTY_MODES, SAMPLING_MODES)
+from model_store import save_model, load_model, MODEL_PATH
+from dynamic_simulation import run_dynamic_simulation
+from atomic import write_csv_atomic
+from pipeline import Pipeline, Stage
+from profiling import Profiler
+from leverage import print_leverage
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+NUM_SIMULATIONS = 5000
+# Re-predicting fixtures as form evolves (--dynamic) needs the saved model and more seasons
+# to settle, since form feeds back into the probabilities
+NUM_DYNAMIC_SIMULATIONS = 10000
+
+# Simulation settings; also the simulate stage's parameters (a change re-runs it)
+simulation = {"num_simulations": NUM_SIMULATIONS, "dynamic": False, "uncertainty": None,
+              "sampling": "plain", "control_variates": False}
+PROFILE_DIR = os.path.join(BASE_DIR, 'output', 'profiles')
+
+# Sections of the stages below; enabled by --profile
+profiler = Profiler()
+
+def data(filename):
+    return os.path.join(DATA_DIR, filename)
+
+# ---------------------------------------------------------
+# STAGES
+# ---------------------------------------------------------
+def scrape():
+    success = scrape_current_season()
+    if not success:
+        print("Scraping failed or no data found.")
+    return success
+
+# Results from the schedule page only (one fetch, no team pages)
+def refresh():
+    if not refresh_results():
+        print("Could not refresh results.")
+        return False
+    return True
+
+def predict():
+    # Get Schedule
+    with profiler.section("load_fixtures"):
+        fixtures = get_upcoming_fixtures()
+
+    if fixtures.empty:
+        print("No upcoming fixtures found. Skipping prediction.")
+        return False
+
+    # Train
+    with profiler.section("build_features"):
+        historical_data, predictors, cols, new_cols, opp_mapping = build_features()
+    with profiler.section("train"):
+        rf_model = fit_model(historical_data, predictors)
+    with profiler.section("save_model"):
+        # Keep the trained model for the web app (preloaded by gunicorn, see app.py)
+        save_model(rf_model, historical_data, predictors, cols, new_cols, opp_mapping)
+
+    # Predict
+    with profiler.section("predict_fixtures"):
+        results = predict_matches(fixtures, rf_model, historical_data, predictors, cols, new_cols, opp_mapping)
+        write_csv_atomic(results, data("upcoming_predictions.csv"))
+
+    # Every tree's probabilities for the same fixtures, for --uncertainty
+    with profiler.section("predict_trees"):
+        tree_probs = predict_tree_probabilities(results, rf_model, historical_data, predictors, cols, new_cols, opp_mapping)
+        save_tree_probabilities(results, tree_probs, DATA_DIR)
+
+    # Every home/away pair of current clubs, for /api/predict
+    with profiler.section("predict_pairs"):
+        save_pair_table(predict_all_pairs(rf_model, historical_data, predictors, cols, new_cols, opp_mapping))
+
+    print("\nPredictions generated successfully.")
+    return True
+
+def simulate():
+    # Get Current Table
+    with profiler.section("standings"):
+        current_dict = get_current_standings()
+    if not current_dict:
+        return False
+
+    # Run Monte Carlo
+    num_simulations = simulation["num_simulations"]
+    with profiler.section("monte_carlo"):
+        if simulation["dynamic"]:
+            bundle = load_model()
+            if bundle is None:
+                print("No saved model. Run --predict first.")
+                return False
+            final_table, distributions = run_dynamic_simulation(current_dict, bundle, num_simulations=num_simulations,
+                                                                return_distributions=True)
+        else:
+            final_table, distributions = run_monte_carlo_simulation(current_dict, num_simulations=num_simulations,
+                                                                    return_distributions=True,
+                                                                    uncertainty=simulation["uncertainty"],
+                                                                    sampling=simulation["sampling"],
+                                                                    control_variates=simulation["control_variates"])
+    if final_table.empty:
+        print("No fixture predictions to simulate. Run --predict first.")
+        return False
+
+    # Sort
+    final_table = final_table.sort_values("Projected Points", ascending=False)
+
+    print("\n" + "="*60)
+    print(f"PROJECTED FINAL PREMIER LEAGUE STANDINGS (Average of {num_simulations:,} Simulations)")
+    print("="*60)
+    # Select relevant columns
+    cols = ["Team", "Played", "Current Points", "Projected Points", "Title %", "Top 4 %", "Relegation %"]
+    print(final_table[cols].to_string(index=False))
+
+    with profiler.section("save_projections"):
+        save_projections(final_table, distributions=distributions)
+    print("\nSimulation complete.")
+    return True
+
+# Declared inputs/outputs: a stage re-runs only when its inputs' hashes change
+STAGES = [
+    Stage("scrape", scrape, description="SCRAPING DATA",
+          outputs=[data("future_matches_2025.csv"), data(RESULTS_FILE), data("fixtures.csv")]),
+    Stage("refresh", refresh, description="REFRESHING RESULTS FROM SCHEDULE",
+          outputs=[data(RESULTS_FILE), data("fixtures.csv")]),
+    Stage("predict", predict, description="GENERATING PREDICTIONS",
+          inputs=[data("matches_data.csv"), data("future_matches_2025.csv"), data("fixtures.csv")],
+          outputs=[data("upcoming_predictions.csv"), data("pair_probabilities.csv"), data("tree_probabilities.npz"), MODEL_PATH]),
+    Stage("simulate", simulate, description="RUNNING SIMULATION",
+          inputs=lambda: [results_path(), data("upcoming_predictions.csv")] + ([MODEL_PATH] if simulation["dynamic"] else [])
+                         + ([data("tree_probabilities.npz")] if simulation["uncertainty"] else []),
+          outputs=[data("projected_standings.csv"), data("simulation_distributions.npz")],
+          params=simulation),
+]
 
 def main():
     parser = argparse.ArgumentParser(description="Premier League Predictor Pipeline")
     parser.add_argument("--scrape", action="store_true", help="Scrape latest data from FBRef")
+    parser.add_argument("--refresh", action="store_true", help="Refresh results and fixtures from the schedule page only (one fetch)")
     parser.add_argument("--predict", action="store_true", help="Generate predictions for upcoming matches")
     parser.add_argument("--simulate", action="store_true", help="Run Monte Carlo simulation for final standings")
+    parser.add_argument("--dynamic", action="store_true", help=f"Simulate with fixtures re-predicted each round from simulated form ({NUM_DYNAMIC_SIMULATIONS:,} seasons)")
+    parser.add_argument("--uncertainty", choices=UNCERTAINTY_MODES, help="Draw each simulated season's probabilities from one forest tree or a bootstrap of trees")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, help="How the simulation's random numbers are drawn (variance reduction, see benchmarks/bench_variance.py; default: plain)")
+    parser.add_argument("--control-variates", action="store_true", help="Correct the zone probabilities with the exact expected points")
+    parser.add_argument("--leverage", nargs="?", const="", metavar="ZONE", help="Show the fixtures that move each zone's odds most (or one zone's, e.g. Title), from the last simulation")
     parser.add_argument("--all", action="store_true", help="Run the full pipeline (Scrape -> Predict -> Simulate)")
-    
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if they are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages would run, without running them")
+    parser.add_argument("--profile", action="store_true", help="Record wall time, CPU time and peak memory per stage (slower: traces allocations)")
+    parser.add_argument("--cprofile", action="store_true", help=f"With --profile, also dump cProfile stats per stage to {os.path.relpath(PROFILE_DIR, BASE_DIR)}/")
+
     args = parser.parse_args()
-    
-    # If no arguments provided, print help
-    if not any(vars(args).values()):
+
+    # If no stage selected, print help
+    if not (args.scrape or args.refresh or args.predict or args.simulate or args.all or args.leverage is not None):
         parser.print_help()
         return
 
-    # 1. SCRAPE
+    # Scraping and refreshing have no local inputs, so they run whenever asked for;
+    # predict and simulate run only if their inputs changed since their last run
+    selected = set()
     if args.scrape or args.all:
-        print("\n" + "="*40)
-        print("STEP 1: SCRAPING DATA")
-        print("="*40)
-        success = scrape_current_season()
-        if not success:
-            print("Scraping failed or no data found. Aborting.")
-            return
-
-    # 2. PREDICT
-    if args.predict or args.all:
-        print("\n" + "="*40)
-        print("STEP 2: GENERATING PREDICTIONS")
-        print("="*40)
-        
-        # Get Schedule
-        fixtures = get_upcoming_fixtures()
-        
-        if not fixtures.empty:
-            # Train
-            rf_model, historical_data, predictors, cols, new_cols, opp_mapping = train_model()
-            
-            # Predict
-            results = predict_matches(fixtures, rf_model, historical_data, predictors, cols, new_cols, opp_mapping)
-            
-            print("\nPredictions generated successfully.")
-            
-            # Save (already handled inside predict_matches, but good to confirm)
-            # results.to_csv(os.path.join("data", "upcoming_predictions.csv"), index=False)
-        else:
-            print("No upcoming fixtures found. Skipping prediction.")
-
-    # 3. SIMULATE
-    if args.simulate or args.all:
-        print("\n" + "="*40)
-        print("STEP 3: RUNNING SIMULATION")
-        print("="*40)
-        
-        # Get Current Table
-        current_dict = get_current_standings()
-        
-        if current_dict:
-            # Run Monte Carlo
-            final_table = run_monte_carlo_simulation(current_dict, num_simulations=5000)
-            
-            # Sort
-            final_table = final_table.sort_values("Projected Points", ascending=False)
-            
-            print("\n" + "="*60)
-            print("PROJECTED FINAL PREMIER LEAGUE STANDINGS (Average of 5,000 Simulations)")
-            print("="*60)
-            # Select relevant columns
-            cols = ["Team", "Played", "Current Points", "Projected Points", "Title %", "Top 4 %", "Relegation %"]
-            print(final_table[cols].to_string(index=False))
-            
-            # Save (already handled inside run_monte_carlo_simulation)
-            # final_table.to_csv(os.path.join("data", "projected_standings.csv"), index=False)
-            print("\nSimulation complete.")
+        selected |= {"scrape", "predict", "simulate"} if args.all else {"scrape"}
+    if args.refresh and not (args.scrape or args.all):
+        selected.add("refresh")
+    if args.predict:
+        selected.add("predict")
+    if args.simulate:
+        selected.add("simulate")
+
+    if args.dynamic and (args.uncertainty or args.sampling or args.control_variates):
+        parser.error("--dynamic cannot be combined with --uncertainty/--sampling/--control-variates")
+    if args.control_variates and args.uncertainty:
+        parser.error("--control-variates needs fixed probabilities and cannot be combined with --uncertainty")
+    if args.dynamic:
+        simulation.update(num_simulations=NUM_DYNAMIC_SIMULATIONS, dynamic=True)
+    else:
+        simulation.update(uncertainty=args.uncertainty, sampling=args.sampling or "plain",
+                          control_variates=args.control_variates)
+
+    profiler.enabled = args.profile and not args.dry_run
+    profiler.cprofile_dir = PROFILE_DIR if args.cprofile else None
+    Pipeline(STAGES).run(selected, force=args.force, dry_run=args.dry_run, profiler=profiler)
+
+    # Reads the distributions saved by the simulation (after it, if it ran now)
+    if args.leverage is not None and not args.dry_run:
+        try:
+            print_leverage(DATA_DIR, zone=args.leverage or None)
+        except KeyError as e:
+            sys.exit(e.args[0])
+
+    if profiler.sections:
+        print("\n" + "="*67)
+        print("PROFILE")
+        print("="*67)
+        print(profiler.summary())
+        if profiler.cprofile_dir:
+            print(f"\ncProfile stats in {profiler.cprofile_dir} (python -m pstats <file>)")
 
 if __name__ == "__main__":
     main()
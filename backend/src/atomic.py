@@ -0,0 +1,24 @@
+# Atomic file writes: data is written to a temp file in the same directory and then
+# renamed over the target, so readers (other gunicorn workers, the CSV caches) see either
+# the old file or the new one, never a half-written one.
+
+import json
+import os
+
+def _tmp_path(path):
+    return f"{path}.{os.getpid()}.tmp"
+
+def write_json_atomic(path, data):
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def write_csv_atomic(df, path):
+    tmp_path = _tmp_path(path)
+    try:
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
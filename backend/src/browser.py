@@ -0,0 +1,254 @@
+# One shared Chrome session for all the scrapers.
+#
+# get_driver() returns a warm, reusable driver: the first call starts Chrome, later calls
+# (from scrape_future.py, scrape_prev.py or get_upcoming_fixtures) get the same session
+# back as long as it is still alive. The session is closed at interpreter exit.
+#
+# The driver binary is resolved from a local cache, so webdriver_manager only goes online
+# to look up driver versions the very first time (or when the cached binary is gone).
+#
+# FBREF_MODE=replay swaps Chrome for recorded pages (see page_store.py).
+#
+# Chrome opens a visible window, as fbref sits behind Cloudflare and its challenge may have
+# to be completed by hand. FBREF_HEADLESS=1 runs it headless (FBREF_HEADLESS=0 forces a
+# window); without the variable, Linux machines with no display (servers, CI) run headless.
+#
+# The lean profile blocks images, fonts, ad and analytics hosts, and every script not served
+# by fbref, its Sports Reference CDN or Cloudflare (see ScriptFilter): fbref pages only need
+# their HTML tables, so everything else is wasted bandwidth and memory. The savings are
+# measured by `benchmarks/bench_scrape.py --lean-compare`.
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from urllib.parse import urlsplit
+import threading
+import atexit
+import shutil
+import sys
+import os
+
+from page_store import ReplayDriver, get_store, replaying
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRIVER_CACHE_FILE = os.path.join(BASE_DIR, 'output', 'chromedriver_path.txt')
+
+# URL patterns blocked by the lean profile (Chrome DevTools Network.setBlockedURLs syntax).
+# Scripts are filtered by host in ScriptFilter; the ad and analytics hosts here also cover
+# their iframes, pixels and XHRs. Cloudflare's challenge is deliberately not listed.
+BLOCKED_URL_PATTERNS = [
+    # Images and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # Known ad and analytics hosts
+    "*googlesyndication.com*", "*doubleclick.net*", "*googletagmanager.com*",
+    "*google-analytics.com*", "*adservice.google.*", "*amazon-adsystem.com*",
+    "*adnxs.com*", "*pubmatic.com*", "*rubiconproject.com*", "*criteo.*",
+    "*quantserve.com*", "*scorecardresearch.com*", "*moatads.com*",
+    "*snigelweb.com*", "*facebook.net*", "*twitter.com*", "*fundingchoicesmessages.google.com*",
+]
+
+# Hosts (and their subdomains) whose scripts the lean profile lets through: fbref itself,
+# the Sports Reference CDN it loads its own scripts from, and Cloudflare, whose bot
+# challenge runs from challenges.cloudflare.com
+ALLOWED_SCRIPT_HOSTS = ("fbref.com", "sports-reference.com", "ssref.net", "cloudflare.com")
+
+_driver = None
+_headless = False
+_script_filter = None
+
+# FBREF_HEADLESS if set, else headless only where no window can be shown
+def headless_default():
+    value = os.environ.get("FBREF_HEADLESS")
+    if value is not None:
+        return value.strip().lower() not in ("", "0", "false", "no")
+    return sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+# ---------------------------------------------------------
+# 1. DRIVER BINARY
+# ---------------------------------------------------------
+# Order: CHROMEDRIVER_PATH env var, the cached path from an earlier run, chromedriver on
+# PATH, and only then webdriver_manager (which checks online) - its result is cached.
+def resolve_driver_path():
+    env_path = os.environ.get("CHROMEDRIVER_PATH")
+    if env_path and os.path.exists(env_path):
+        return env_path
+
+    if os.path.exists(DRIVER_CACHE_FILE):
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = f.read().strip()
+        if cached and os.path.exists(cached):
+            return cached
+
+    on_path = shutil.which("chromedriver")
+    if on_path:
+        return on_path
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    print("Resolving chromedriver online (first run only)...")
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+    with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+        f.write(path)
+    return path
+
+# ---------------------------------------------------------
+# 2. CHROME OPTIONS
+# ---------------------------------------------------------
+def build_options(lean=True, headless=False):
+    options = Options()
+    # Non-headless mode can help to get past Cloudflare bot protection
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    if lean:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        # The tables are in the HTML, so stop waiting once the DOM is ready
+        options.page_load_strategy = "eager"
+    return options
+
+# ---------------------------------------------------------
+# 3. THIRD-PARTY SCRIPT FILTER
+# ---------------------------------------------------------
+def script_allowed(url):
+    host = urlsplit(url).hostname or ""
+    return any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_SCRIPT_HOSTS)
+
+# Pauses every script request of the page (CDP Fetch.enable with a resourceType "Script"
+# pattern) and fails the ones from hosts outside ALLOWED_SCRIPT_HOSTS. Paused requests
+# arrive as Fetch.requestPaused events, which need a live DevTools connection: it runs on a
+# background thread (selenium's trio-based bidi_connection) for as long as Chrome does.
+# Interception stops by itself when the connection closes, so a dead filter never leaves
+# requests hanging.
+class ScriptFilter:
+    def __init__(self, driver):
+        self.driver = driver
+        self.allowed = 0
+        self.blocked = 0
+        self.error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="script-filter", daemon=True)
+
+    # Starts the filter; returns once interception is on (before the first page loads)
+    def start(self, timeout=15):
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("DevTools connection did not open")
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        import trio
+        try:
+            trio.run(self._listen)
+        except Exception as e:
+            # After start() this is the connection closing with Chrome
+            self.error = e
+        finally:
+            self._ready.set()
+
+    async def _listen(self):
+        async with self.driver.bidi_connection() as connection:
+            session, devtools = connection.session, connection.devtools
+            pattern = devtools.fetch.RequestPattern(resource_type=devtools.network.ResourceType.SCRIPT,
+                                                    request_stage=devtools.fetch.RequestStage.REQUEST)
+            await session.execute(devtools.fetch.enable(patterns=[pattern]))
+            self._ready.set()
+            async for event in session.listen(devtools.fetch.RequestPaused):
+                if script_allowed(event.request.url):
+                    self.allowed += 1
+                    await session.execute(devtools.fetch.continue_request(event.request_id))
+                else:
+                    self.blocked += 1
+                    await session.execute(devtools.fetch.fail_request(event.request_id,
+                                                                      devtools.network.ErrorReason.BLOCKED_BY_CLIENT))
+
+# Scripts let through and blocked so far by the current session's filter, or None
+def script_filter_counts():
+    if _script_filter is None:
+        return None
+    return {"allowed": _script_filter.allowed, "blocked": _script_filter.blocked}
+
+# ---------------------------------------------------------
+# 4. SHARED SESSION
+# ---------------------------------------------------------
+def _is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+# Returns the shared driver, starting Chrome only if there is no live session yet.
+# headless=None uses headless_default(); a live session is reused as it is.
+# In replay mode (see page_store.py) recorded pages are served instead and Chrome never starts.
+def get_driver(lean=True, headless=None):
+    global _driver, _headless, _script_filter
+    if replaying():
+        if not isinstance(_driver, ReplayDriver) or _driver.store is not get_store():
+            _driver = ReplayDriver(get_store())
+        return _driver
+    if _driver is not None and _is_alive(_driver):
+        return _driver
+
+    _headless = headless_default() if headless is None else headless
+    _driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=build_options(lean, _headless))
+    _driver.set_page_load_timeout(90)
+    if lean:
+        try:
+            _driver.execute_cdp_cmd("Network.enable", {})
+            _driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except WebDriverException as e:
+            print(f"Could not set blocked URLs, loading pages in full: {e}")
+        _script_filter = ScriptFilter(_driver)
+        try:
+            _script_filter.start()
+        except Exception as e:
+            print(f"Could not filter third-party scripts, loading them: {e}")
+            _script_filter = None
+    else:
+        _script_filter = None
+    return _driver
+
+# Tells the user how a Cloudflare challenge on the first page will be handled
+def print_challenge_notice():
+    if replaying():
+        return
+    print("\n" + "="*60)
+    if _headless:
+        print("ATTENTION: Chrome is running headless (no display, or FBREF_HEADLESS=1),")
+        print("so a Cloudflare challenge cannot be completed by hand. If the first page")
+        print("does not load, run again with FBREF_HEADLESS=0 on a machine with a display.")
+    else:
+        print("ATTENTION: If you see a Cloudflare challenge page,")
+        print("please complete the verification manually in the browser window.")
+        print("The script will wait for you to finish...")
+    print("="*60 + "\n")
+
+def quit_driver():
+    global _driver, _script_filter
+    _script_filter = None
+    if _driver is not None:
+        try:
+            _driver.quit()
+        except WebDriverException:
+            pass
+        _driver = None
+
+atexit.register(quit_driver)
@@ -0,0 +1,176 @@
+# Monte Carlo simulation that re-predicts fixtures as form evolves.
+#
+# The standard simulation (project_standings.py) plays every remaining fixture with the
+# probabilities predicted today, so a May fixture uses December form. Here each simulated
+# season keeps its own state for every team, updated after each simulated round:
+#   - the last 5 matches behind the rolling features (goals for/against, shots, shots on
+#     target, points). A simulated result adds the team's average stats in its past
+#     matches with that result (e.g. Arsenal's average win: 2.3 goals for, 15 shots, ...)
+#   - points and games for the season PPG features
+# Before each round, the round's fixtures are re-scored for all simulations at once: one
+# feature matrix of (simulations x fixtures) rows, de-duplicated (many simulated seasons
+# share the same state, especially early on), and a single predict_proba call.
+#
+#     bundle = load_model()   # model_store.py, saved by main.py --predict
+#     table = run_dynamic_simulation(get_current_standings(), bundle, num_simulations=10000)
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from project_standings import (DATA_DIR, PREMIER_LEAGUE, finishing_positions, league_result,
+                               sharpen_probabilities)
+
+WINDOW = 5
+# Kick-off assumed for every fixture, as in predict_matches
+HOUR = 15
+
+# Splits date-ordered fixtures into rounds in which every team plays at most once
+def split_rounds(home_idx, away_idx):
+    rounds, current, busy = [], [], set()
+    for f, (h, a) in enumerate(zip(home_idx, away_idx)):
+        if h in busy or a in busy:
+            rounds.append(current)
+            current, busy = [], set()
+        current.append(f)
+        busy |= {h, a}
+    if current:
+        rounds.append(current)
+    return [np.array(r) for r in rounds]
+
+# Each team's average stats (cols) in its matches of the last two seasons, by result from
+# its own side: [loss, draw, win] x cols. Outcomes a team has too few matches for use
+# the league average.
+def outcome_stats(data, teams, cols, season=2025, min_matches=3):
+    recent = data[data["season"] >= season - 1]
+    result = recent["result"].map({"L": 0, "D": 1, "W": 2})
+    league = recent.groupby(result)[cols].mean().reindex(range(3))
+    by_team = recent.groupby([recent["new_team"], result])[cols].agg(["mean", "count"])
+    stats = np.empty((len(teams), 3, len(cols)))
+    for t, team in enumerate(teams):
+        for o in range(3):
+            key = (team, o)
+            if key in by_team.index and by_team.loc[key, (cols[0], "count")] >= min_matches:
+                stats[t, o] = [by_team.loc[key, (c, "mean")] for c in cols]
+            else:
+                stats[t, o] = league.loc[o, cols].to_numpy()
+    return stats
+
+# Simulated final table with fixtures re-predicted each round from the simulated form.
+# bundle is the saved model (model_store.load_model()); the other arguments are as for
+# run_monte_carlo_simulation.
+def run_dynamic_simulation(current_standings, bundle, num_simulations=10000, progress=None, return_distributions=False,
+                           data_dir=DATA_DIR, config=PREMIER_LEAGUE, season=2025, rng=None):
+    print(f"Running {num_simulations} dynamic Monte Carlo simulations...")
+    rng = rng if rng is not None else np.random.default_rng()
+    try:
+        preds = pd.read_csv(os.path.join(data_dir, "upcoming_predictions.csv"))
+    except FileNotFoundError:
+        print("Error: upcoming_predictions.csv not found.")
+        return (pd.DataFrame(), None) if return_distributions else pd.DataFrame()
+
+    model, data = bundle["model"], bundle["data"]
+    predictors, cols, new_cols = bundle["predictors"], bundle["cols"], bundle["new_cols"]
+    teams = list(current_standings)
+    index = {team: i for i, team in enumerate(teams)}
+    known = set(data["new_team"])
+    missing = sorted({t for t in preds["Home"].tolist() + preds["Away"].tolist() if t not in index or t not in known})
+    if missing:
+        print(f"Skipping fixtures of teams without a table entry or match history: {', '.join(missing)}")
+        preds = preds[~preds["Home"].isin(missing) & ~preds["Away"].isin(missing)]
+    preds = preds.assign(Date=pd.to_datetime(preds["Date"])).sort_values("Date", kind="stable").reset_index(drop=True)
+
+    home_idx = preds["Home"].map(index).to_numpy()
+    away_idx = preds["Away"].map(index).to_numpy()
+    day_code = preds["Date"].dt.dayofweek.to_numpy()
+    opp_code = preds["Away"].map(bundle["opp_mapping"]).fillna(-1).to_numpy()
+    rounds = split_rounds(home_idx, away_idx)
+    n_teams, n_cols, S = len(teams), len(cols), num_simulations
+
+    # Starting state, as predict_matches sees it: each team's last 5 matches and season PPG
+    data = data.sort_values("date")
+    window = np.full((n_teams, WINDOW, n_cols), np.nan)
+    season_points = np.zeros(n_teams)
+    season_games = np.zeros(n_teams)
+    for t, team in enumerate(teams):
+        rows = data[data["new_team"] == team]
+        last = rows[cols].to_numpy()[-WINDOW:]
+        window[t, WINDOW - len(last):] = last
+        current = rows[rows["season"] == season]
+        season_points[t], season_games[t] = current["points"].sum(), len(current)
+    stats = outcome_stats(data, teams, cols, season)
+
+    # Per simulation: the window is a ring buffer per team (every simulated season plays
+    # the same fixtures, so all share the same write position)
+    window = np.broadcast_to(window, (S, n_teams, WINDOW, n_cols)).copy()
+    slot = np.zeros(n_teams, dtype=int)
+    season_points = np.broadcast_to(season_points, (S, n_teams)).copy()
+    season_games = np.broadcast_to(season_games, (S, n_teams)).copy()
+    points = np.broadcast_to(np.array([current_standings[t]["Points"] for t in teams], dtype=float), (S, n_teams)).copy()
+    outcome_counts = np.zeros((len(preds), 3), dtype=np.int32)
+    outcomes = np.empty((S, len(preds)), dtype=np.int8) if return_distributions else None
+    unique_rows = 0
+
+    sims = np.arange(S)[:, None]
+    for r, fixtures in enumerate(rounds):
+        if progress is not None:
+            progress(S * r // len(rounds), S)
+        h, a = home_idx[fixtures], away_idx[fixtures]
+        n = len(fixtures)
+
+        # Features of every (simulation, fixture) pair, in the model's predictor order
+        with np.errstate(invalid="ignore"):
+            home_form = np.nanmean(window[:, h], axis=2)
+            away_form = np.nanmean(window[:, a], axis=2)
+            ppg = np.nan_to_num(season_points / season_games)
+        columns = {
+            "venue_code": np.ones((S, n)),
+            "opp_code": np.broadcast_to(opp_code[fixtures], (S, n)),
+            "hour": np.full((S, n), HOUR),
+            "day_code": np.broadcast_to(day_code[fixtures], (S, n)),
+            "season_ppg": ppg[:, h],
+            "opp_season_ppg": ppg[:, a],
+        }
+        for c, new_col in enumerate(new_cols):
+            columns[new_col] = home_form[:, :, c]
+            columns[f"opp_{new_col}"] = away_form[:, :, c]
+        X = np.stack([columns[p].reshape(-1) for p in predictors], axis=1)
+
+        # One batched model call over the distinct states
+        X_unique, inverse = np.unique(X, axis=0, return_inverse=True)
+        unique_rows += len(X_unique)
+        probs = model.predict_proba(pd.DataFrame(X_unique, columns=predictors))[inverse.reshape(-1)]
+        # 0=Loss, 1=Draw, 2=Win for the home side -> [home win, draw, away win]
+        probs = sharpen_probabilities(probs[:, [2, 1, 0]]).reshape(S, n, 3)
+
+        u = rng.random((S, n))
+        home_win = u < probs[:, :, 0]
+        draw = ~home_win & (u < probs[:, :, 0] + probs[:, :, 1])
+        away_win = ~home_win & ~draw
+        outcome_counts[fixtures] += np.stack([home_win.sum(axis=0), draw.sum(axis=0), away_win.sum(axis=0)], axis=1)
+        if outcomes is not None:
+            outcomes[:, fixtures] = draw + 2 * away_win
+
+        # Update the table, PPG and rolling windows of both sides
+        home_result = 2 * home_win + draw  # 0=Loss, 1=Draw, 2=Win from the home side
+        away_result = 2 - home_result
+        points[sims, h] += (3 * home_win + draw)
+        points[sims, a] += (3 * away_win + draw)
+        season_points[sims, h] += (3 * home_win + draw)
+        season_points[sims, a] += (3 * away_win + draw)
+        season_games[:, h] += 1
+        season_games[:, a] += 1
+        window[:, h, slot[h]] = stats[h, home_result]
+        window[:, a, slot[a]] = stats[a, away_result]
+        slot[h] = (slot[h] + 1) % WINDOW
+        slot[a] = (slot[a] + 1) % WINDOW
+
+    print(f"Re-predicted {len(preds)} fixtures in {len(rounds)} rounds: {unique_rows:,} distinct feature rows "
+          f"for {S * len(preds):,} simulated fixtures")
+    final_points = points.astype(np.int16)
+    positions = finishing_positions(final_points, [list(range(n_teams))], rng)[:, 0]
+    matches = [{"Date": d.date(), "Home": home, "Away": away}
+               for d, home, away in zip(preds["Date"], preds["Home"], preds["Away"])]
+    return league_result(config, {t: current_standings[t]["Points"] for t in teams}, matches,
+                         final_points, positions, outcome_counts, return_distributions, outcomes=outcomes)
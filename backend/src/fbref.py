@@ -0,0 +1,151 @@
+# Shared helpers for building fbref URLs and parsing fbref match log tables.
+# Used by scrape_prev.py and scrape_future.py.
+
+import pandas as pd
+
+FBREF_URL = "https://fbref.com"
+
+# Columns of the shooting "matchlogs_for" table, in order, after the Date <th> cell.
+# Only the columns the model needs are kept (see SHOOTING_LOG_KEEP).
+SHOOTING_LOG_COLUMNS = [
+    "Time", "Competition", "Round", "Day", "Venue", "Result", "Goals For", "Goals Against",
+    "Opponent", "Goals Scored", "Shots Total", "Shots on Target", "Shots on Target %",
+    "Goals/Shot", "Goals/Shots on Target", "Average Shot Distance", "Free Kicks",
+    "Penalty Kicks Scored", "Penalty Kicks Attempted",
+]
+
+# Same column order as the old fixtures + shooting merge, so the CSV layout is unchanged
+SHOOTING_LOG_KEEP = [
+    "Date", "Time", "Competition", "Round", "Day", "Venue", "Result", "Goals For",
+    "Goals Against", "Opponent", "Shots Total", "Shots on Target", "Average Shot Distance",
+    "Free Kicks", "Penalty Kicks Scored", "Penalty Kicks Attempted",
+]
+
+# Converts a season start year into fbref's season slug, e.g. 2025 -> "2025-2026"
+def season_slug(year):
+    return f"{year}-{year + 1}"
+
+# Splits a squad URL into (team id, season slug or None, team slug).
+# "/en/squads/822bd0ba/2023-2024/Liverpool-Stats" -> ("822bd0ba", "2023-2024", "Liverpool")
+# "https://fbref.com/en/squads/822bd0ba/Liverpool-Stats" -> ("822bd0ba", None, "Liverpool")
+def parse_team_url(team_url):
+    parts = team_url.split("/squads/", 1)[1].strip("/").split("/")
+    team_id = parts[0]
+    season = parts[1] if len(parts) == 3 else None
+    team_slug = parts[-1].replace("-Stats", "")
+    return team_id, season, team_slug
+
+# Builds the all-competitions shooting match log URL straight from the team id,
+# so the team page does not have to be loaded just to find the link.
+def shooting_log_url(team_url, year):
+    team_id, season, team_slug = parse_team_url(team_url)
+    season = season or season_slug(year)
+    return f"{FBREF_URL}/en/squads/{team_id}/{season}/matchlogs/all_comps/shooting/{team_slug}-Match-Logs-All-Competitions"
+
+# Builds full match rows (fixture info + shooting stats) from the shooting match log alone.
+# Matches that have not been played yet (no result) are dropped.
+def parse_shooting_log(shooting_table):
+    rows = []
+    for row in shooting_table.tbody.find_all("tr"):
+        cols = row.find_all("td")
+        if len(cols) < len(SHOOTING_LOG_COLUMNS):
+            continue
+        data = {"Date": row.find("th").text.strip()}
+        for name, col in zip(SHOOTING_LOG_COLUMNS, cols):
+            data[name] = col.text.strip()
+        rows.append(data)
+
+    df = pd.DataFrame(rows, columns=["Date"] + SHOOTING_LOG_COLUMNS)
+    df = df[df["Result"] != ""]
+    return df[SHOOTING_LOG_KEEP]
+
+# ---------------------------------------------------------
+# SEASON SCHEDULE ("sched_*" table)
+# ---------------------------------------------------------
+SCHEDULE_URL = f"{FBREF_URL}/en/comps/9/schedule/Premier-League-Scores-and-Fixtures"
+
+# Shooting columns merged onto schedule results (the rest of the row comes from the schedule)
+SHOOTING_STATS = [
+    "Shots Total", "Shots on Target", "Average Shot Distance",
+    "Free Kicks", "Penalty Kicks Scored", "Penalty Kicks Attempted",
+]
+
+# Returns the season schedule table, whatever season it is for (e.g. "sched_2025-2026_9_1")
+def find_schedule_table(soup):
+    return soup.find("table", id=lambda x: x and x.startswith("sched_"))
+
+# Team name as used in the scraped CSVs: taken from the squad URL, e.g. "Manchester United"
+def team_name_from_url(team_url):
+    return team_url.split("/")[-1].replace("-Stats", "").replace("-", " ")
+
+def _cell_text(row, stat):
+    cell = row.find(["td", "th"], {"data-stat": stat})
+    return cell.text.strip() if cell else ""
+
+def _cell_href(row, stat):
+    cell = row.find("td", {"data-stat": stat})
+    link = cell.find("a", href=True) if cell else None
+    return f"{FBREF_URL}{link.get('href')}" if link else None
+
+# Parses the season schedule into:
+#   results   - one row per team per played match (same columns as the match logs,
+#               minus the shooting stats), so W/D/L, goals and opponent need no team pages
+#   fixtures  - upcoming matches (date, home_team, away_team) using the schedule's names
+#   team_urls - squad URLs of every team in the schedule, for the shooting logs
+def parse_schedule(schedule_table):
+    results = []
+    fixtures = []
+    team_urls = []
+
+    for row in schedule_table.tbody.find_all("tr"):
+        # Skip spacer and repeated header rows
+        if "spacer" in row.get("class", []) or "thead" in row.get("class", []):
+            continue
+
+        date = _cell_text(row, "date")
+        home = _cell_text(row, "home_team")
+        away = _cell_text(row, "away_team")
+        if not (date and home and away):
+            continue
+
+        home_url = _cell_href(row, "home_team")
+        away_url = _cell_href(row, "away_team")
+        for url in (home_url, away_url):
+            if url and url not in team_urls:
+                team_urls.append(url)
+
+        score = _cell_text(row, "score")
+        if not score:
+            fixtures.append({"date": date, "home_team": home, "away_team": away})
+            continue
+
+        # Scores use an en dash, e.g. "2–1"; penalty shoot-outs are not used in the league
+        home_goals, away_goals = [int(g) for g in score.replace("–", "-").split("-")[:2]]
+        common = {
+            "Date": date,
+            "Time": _cell_text(row, "start_time"),
+            "Competition": "Premier League",
+            "Round": f"Matchweek {_cell_text(row, 'gameweek')}",
+            "Day": _cell_text(row, "dayofweek"),
+        }
+        for venue, team_url, goals_for, goals_against, opponent in (
+            ("Home", home_url, home_goals, away_goals, away),
+            ("Away", away_url, away_goals, home_goals, home),
+        ):
+            if goals_for > goals_against:
+                result = "W"
+            elif goals_for == goals_against:
+                result = "D"
+            else:
+                result = "L"
+            results.append({
+                **common,
+                "Venue": venue,
+                "Result": result,
+                "Goals For": goals_for,
+                "Goals Against": goals_against,
+                "Opponent": opponent,
+                "Team": team_name_from_url(team_url) if team_url else (home if venue == "Home" else away),
+            })
+
+    return pd.DataFrame(results), pd.DataFrame(fixtures), team_urls
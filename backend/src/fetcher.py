@@ -0,0 +1,226 @@
+# Page fetching for the fbref scrapers: one place that loads a page, waits for its table,
+# parses it, and records how long each step took.
+#
+#   RunLog           - structured per-fetch timing log (JSON lines) with a per-run summary
+#   AdaptiveScheduler - replaces the fixed sleeps; waits and backoff follow observed load times
+#   fetch_page       - load + wait + parse a page, logging DNS/load/wait/parse durations and retries
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchWindowException, InvalidSessionIdException
+from bs4 import BeautifulSoup
+from datetime import datetime
+import json
+import time
+import os
+
+from page_store import record_page, replaying
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_LOG_DIR = os.path.join(BASE_DIR, 'output', 'scrape_runs')
+
+# ---------------------------------------------------------
+# 1. RUN LOG
+# ---------------------------------------------------------
+class RunLog:
+    def __init__(self, name, log_dir=RUN_LOG_DIR):
+        self.run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{name}"
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, f"{self.run_id}.jsonl")
+        self.entries = []
+        self.started = time.perf_counter()
+        os.makedirs(log_dir, exist_ok=True)
+
+    # Appends one fetch record to the run log file
+    def record(self, entry):
+        self.entries.append(entry)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    # Totals per phase over the run, plus the slowest pages
+    def summary(self):
+        phases = ["idle_s", "dns_s", "load_s", "wait_s", "parse_s"]
+        totals = {p: round(sum(e[p] for e in self.entries), 3) for p in phases}
+        slowest = sorted(self.entries, key=lambda e: e["total_s"], reverse=True)[:3]
+        return {
+            "run_id": self.run_id,
+            "pages": len(self.entries),
+            "failed": sum(1 for e in self.entries if not e["ok"]),
+            "retries": sum(e["retries"] for e in self.entries),
+            "run_s": round(time.perf_counter() - self.started, 3),
+            "phase_totals_s": totals,
+            "slowest": [{"url": e["url"], "total_s": e["total_s"]} for e in slowest],
+        }
+
+    # Prints the summary and saves it next to the run log
+    def close(self):
+        summary = self.summary()
+        with open(os.path.join(self.log_dir, f"{self.run_id}.summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        print("\n" + "="*60)
+        print(f"SCRAPE TIMING SUMMARY ({summary['run_id']})")
+        print("="*60)
+        print(f"Pages: {summary['pages']}  Failed: {summary['failed']}  Retries: {summary['retries']}  Run time: {summary['run_s']:.1f}s")
+        for phase, total in summary["phase_totals_s"].items():
+            print(f"  {phase[:-2]:<6} {total:>9.1f}s")
+        for page in summary["slowest"]:
+            print(f"  slow: {page['total_s']:.1f}s  {page['url']}")
+        print(f"Run log saved to {self.path}")
+        return summary
+
+# ---------------------------------------------------------
+# 2. ADAPTIVE WAIT SCHEDULER
+# ---------------------------------------------------------
+# Keeps an exponentially weighted average of page load times and derives from it:
+#   - the gap between request starts (politeness), so time spent parsing counts towards it
+#     instead of sleeping a fixed amount after every page
+#   - the interval for polling a table that has not rendered yet
+#   - the backoff before a retry, which grows with consecutive failures
+class AdaptiveScheduler:
+    def __init__(self, min_gap=2.0, max_gap=30.0, min_poll=0.25, max_poll=2.0, alpha=0.3):
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.alpha = alpha
+        self.avg_load = None
+        self.failures = 0
+        self.last_request = None
+
+    def observe(self, load_s, ok):
+        self.avg_load = load_s if self.avg_load is None else self.alpha * load_s + (1 - self.alpha) * self.avg_load
+        self.failures = 0 if ok else self.failures + 1
+
+    def gap(self):
+        base = max(self.min_gap, self.avg_load or 0)
+        return min(self.max_gap, base * (2 ** self.failures))
+
+    def poll_interval(self):
+        guess = (self.avg_load or self.max_poll * 4) / 4
+        return min(self.max_poll, max(self.min_poll, guess))
+
+    def backoff(self, attempt):
+        return min(self.max_gap, max(self.min_gap, self.avg_load or 0) * (2 ** attempt))
+
+    # Sleeps only for what is left of the gap since the previous request started
+    def wait_turn(self):
+        idle = 0.0
+        if self.last_request is not None:
+            idle = max(0.0, self.gap() - (time.perf_counter() - self.last_request))
+            if idle:
+                time.sleep(idle)
+        self.last_request = time.perf_counter()
+        return idle
+
+# ---------------------------------------------------------
+# 3. FETCH A PAGE
+# ---------------------------------------------------------
+def _navigation_timing(driver):
+    # DNS and load durations as seen by the browser (Navigation Timing API), in seconds
+    try:
+        t = driver.execute_script(
+            "var t = window.performance.timing;"
+            "return [t.domainLookupStart, t.domainLookupEnd, t.navigationStart, t.loadEventEnd];")
+        dns = (t[1] - t[0]) / 1000
+        load = (t[3] - t[2]) / 1000 if t[3] else None
+        return max(dns, 0.0), load
+    except Exception:
+        return 0.0, None
+
+def _load(driver, url):
+    try:
+        driver.get(url)
+    except TimeoutException:
+        print("Page load timed out, but continuing...")
+        driver.execute_script("window.stop();")
+    except InvalidSessionIdException:
+        print("❌ Browser session lost (browser closed or crashed). Exiting...")
+        exit(1)
+    except WebDriverException as e:
+        print(f"WebDriverException encountered: {e}")
+        print("Attempting to proceed...")
+
+def _wait_for(driver, selector, max_wait, scheduler, progress):
+    # Polls for the selector at the scheduler's interval; returns True once it is present
+    deadline = time.perf_counter() + max_wait
+    next_progress = 10
+    while True:
+        try:
+            if driver.find_elements(By.CSS_SELECTOR, selector):
+                return True
+        except NoSuchWindowException:
+            print("❌ Browser window closed. Exiting...")
+            exit(1)
+        except InvalidSessionIdException:
+            print("❌ Browser session lost. Exiting...")
+            exit(1)
+        except WebDriverException:
+            pass
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        if progress and max_wait - remaining >= next_progress:
+            print(f"Still waiting... ({int(max_wait - remaining)}/{max_wait} seconds)")
+            next_progress += 10
+        time.sleep(min(scheduler.poll_interval(), remaining))
+
+# Loads url, waits up to max_wait seconds for selector and returns the parsed page
+# (BeautifulSoup), or None if the page source could not be read. If the selector never
+# shows up the page is retried after a backoff; the last attempt is returned either way.
+# Every attempt's timings go to run_log when given.
+# In record mode every page is saved (see page_store.py); in replay mode there is no server
+# to be polite to, so no gaps or retries.
+def fetch_page(driver, url, selector, scheduler, run_log=None, max_wait=60, retries=1, label="", progress=False):
+    offline = replaying()
+    if offline:
+        retries = 0
+        max_wait = 0
+    soup = None
+    for attempt in range(retries + 1):
+        delay = 0.0
+        if attempt:
+            delay = scheduler.backoff(attempt)
+            print(f"  Table not found, retrying in {delay:.1f}s ({attempt}/{retries})...")
+            time.sleep(delay)
+        idle = delay + (0.0 if offline else scheduler.wait_turn())
+
+        start = time.perf_counter()
+        _load(driver, url)
+        loaded = time.perf_counter()
+        ok = _wait_for(driver, selector, max_wait, scheduler, progress)
+        waited = time.perf_counter() - loaded
+        dns, browser_load = _navigation_timing(driver)
+        load = browser_load if browser_load is not None else loaded - start
+        scheduler.observe(load, ok)
+
+        parse_start = time.perf_counter()
+        try:
+            html = driver.page_source
+            record_page(url, html)
+            soup = BeautifulSoup(html, "html.parser")
+        except (NoSuchWindowException, InvalidSessionIdException):
+            print("❌ Browser session lost. Exiting...")
+            exit(1)
+        except Exception as e:
+            print(f"❌ Error getting page source: {e}")
+            soup = None
+        parsed = time.perf_counter() - parse_start
+
+        if run_log is not None:
+            run_log.record({
+                "url": url,
+                "label": label,
+                "attempt": attempt,
+                "retries": 1 if attempt else 0,
+                "ok": ok and soup is not None,
+                "idle_s": round(idle, 3),
+                "dns_s": round(dns, 3),
+                "load_s": round(load, 3),
+                "wait_s": round(waited, 3),
+                "parse_s": round(parsed, 3),
+                "total_s": round(idle + (time.perf_counter() - start), 3),
+            })
+        if ok:
+            break
+    return soup
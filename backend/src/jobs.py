@@ -0,0 +1,201 @@
+# Background jobs for long-running work started from the web app (e.g. simulations).
+#
+# submit() hands a function to a small thread pool and returns a job id straight away;
+# the function gets a progress(done, total) callback. Job state is kept as one JSON file
+# per job under output/jobs, so any gunicorn worker can answer a status request, not only
+# the worker that runs the job.
+#
+# Coordination between workers also goes through that directory:
+#   - single flight: a job submitted with a key (e.g. a hash of its inputs) takes a lock
+#     file for that key; identical submissions from any worker get the running job's id
+#     instead of starting another run
+#   - queue limit: at most max_active jobs may be queued or running across all workers;
+#     submit() raises QueueFull beyond that instead of piling up work
+#
+# Finished jobs are kept for job_ttl seconds (their status stays readable), then removed
+# by the next submit(), so the directory does not grow with every request.
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import traceback
+import uuid
+import glob
+import time
+import json
+import os
+
+from atomic import write_json_atomic
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOBS_DIR = os.path.join(BASE_DIR, 'output', 'jobs')
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Lock file exists but its holder has not been written yet
+LOCK_PENDING = "pending"
+# Seconds a finished job's file is kept after its last update
+JOB_TTL = 3600
+
+class QueueFull(Exception):
+    pass
+
+class JobRunner:
+    def __init__(self, max_workers=1, max_active=4, jobs_dir=JOBS_DIR, job_ttl=JOB_TTL):
+        self.jobs_dir = jobs_dir
+        self.max_active = max_active
+        self.job_ttl = job_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _lock_path(self, key):
+        return os.path.join(self.jobs_dir, f"lock-{key}")
+
+    def _save(self, job):
+        write_json_atomic(self._path(job["id"]), job)
+
+    # Returns the job's state, or None for an unknown id
+    def get(self, job_id):
+        # Job ids are uuid hex strings; anything else cannot name a job file
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    # Job id held by a lock file, or None if the lock is gone or stale (its job finished,
+    # or the worker that took it died without cleaning up)
+    def _lock_holder(self, lock_path):
+        try:
+            with open(lock_path, encoding="utf-8") as f:
+                lock = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # Being written right now by another worker, or left empty by one that crashed
+            try:
+                if time.time() - os.path.getmtime(lock_path) < 10:
+                    return LOCK_PENDING
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            return None
+        job = self.get(lock["job_id"])
+        if job is None or job["status"] not in ("queued", "running") or not _pid_alive(lock["pid"]):
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            return None
+        return lock["job_id"]
+
+    # Number of queued or running jobs across all workers
+    def active_jobs(self):
+        return sum(1 for path in glob.glob(os.path.join(self.jobs_dir, "lock-*")) if self._lock_holder(path))
+
+    # Removes done or failed jobs last updated more than job_ttl seconds ago; returns how many
+    def prune(self):
+        cutoff = time.time() - self.job_ttl
+        removed = 0
+        for path in glob.glob(os.path.join(self.jobs_dir, "*.json")):
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    status = json.load(f).get("status")
+                if status in ("done", "failed"):
+                    os.remove(path)
+                    removed += 1
+            except (FileNotFoundError, ValueError):
+                # Removed by another worker, or being written right now
+                continue
+        return removed
+
+    # Queues fn(*args, progress=callback, **kwargs) and returns (job id, started).
+    # Whatever fn returns (JSON-serialisable) becomes the job's result.
+    # With a key, an identical job already in flight is joined instead: its id is returned
+    # with started=False. Raises QueueFull when max_active jobs are already in flight.
+    def submit(self, kind, fn, *args, key=None, **kwargs):
+        self.prune()
+        key = key or uuid.uuid4().hex
+        lock_path = self._lock_path(key)
+        job_id = uuid.uuid4().hex
+
+        for _ in range(20):
+            holder = self._lock_holder(lock_path)
+            if holder == LOCK_PENDING:
+                time.sleep(0.05)
+                continue
+            if holder:
+                return holder, False
+            if self.active_jobs() >= self.max_active:
+                raise QueueFull(f"Too many jobs in progress (limit {self.max_active}).")
+            try:
+                # O_EXCL makes taking the lock atomic across processes
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Another worker took it first; join its job on the next pass
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                job = self._new_job(job_id, kind, key)
+                self._save(job)
+                json.dump({"job_id": job_id, "pid": os.getpid()}, f)
+            self.executor.submit(self._run, job, lock_path, fn, args, kwargs)
+            return job_id, True
+        raise QueueFull("Could not take the job lock, try again shortly.")
+
+    def _new_job(self, job_id, kind, key):
+        return {
+            "id": job_id,
+            "kind": kind,
+            "key": key,
+            "status": "queued",
+            "progress": 0.0,
+            "created": _now(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+
+    def _run(self, job, lock_path, fn, args, kwargs):
+        job["status"] = "running"
+        job["started"] = _now()
+        self._save(job)
+
+        # Progress is saved at most once per percent
+        def progress(done, total):
+            value = round(done / total, 2) if total else 1.0
+            if value > job["progress"]:
+                job["progress"] = value
+                self._save(job)
+
+        try:
+            job["result"] = fn(*args, progress=progress, **kwargs)
+            job["status"] = "done"
+            job["progress"] = 1.0
+        except Exception as e:
+            traceback.print_exc()
+            job["status"] = "failed"
+            job["error"] = str(e)
+        job["finished"] = _now()
+        self._save(job)
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
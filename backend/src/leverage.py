@@ -0,0 +1,135 @@
+# Fixture leverage: which remaining games matter most for the title, top 4 or relegation.
+#
+# For every fixture, outcome (home win / draw / away win), zone and team, the probability
+# of the team finishing in the zone among the simulated seasons in which the fixture ended
+# that way. Since the fixtures are simulated independently, that is what re-running the
+# simulation with the result fixed would give, for all fixtures at once from one run (with
+# --dynamic or --uncertainty the fixtures are correlated, so a result also carries what it
+# says about form or model):
+#
+#     conditional[f, o, z, t] = sum over seasons of [outcome f = o] * [team t in zone z]
+#                               / seasons with outcome f = o
+#
+# computed as one (fixtures x seasons) @ (seasons x teams*zones) product per outcome,
+# over chunks of seasons. The simulation keeps it in its distributions (league_result) and
+# the report ranks fixtures by their swing: the largest difference a result makes to one
+# team's odds.
+#
+#     python backend/main.py --leverage Title
+#     python backend/src/leverage.py --zone Relegation --team Burnley
+
+import argparse
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+OUTCOMES = ["Home Win", "Draw", "Away Win"]
+# Seasons per matrix product (bounds the float32 one-hot copies)
+CHUNK = 4096
+# Outcomes sampled fewer times than this get no conditional odds (too noisy to rank)
+MIN_SAMPLES = 20
+
+# Zone probabilities given each fixture's outcome. outcomes is (simulations, fixtures) with
+# 0 = home win, 1 = draw, 2 = away win; positions is (simulations, teams), 0 = top; zones
+# maps labels to (first, last) positions. Returns (conditional, zone_probs):
+# (fixtures, 3, zones, teams) with NaN for outcomes sampled fewer than min_samples times,
+# and the unconditional (zones, teams).
+def fixture_leverage(outcomes, positions, zones, chunk=CHUNK, min_samples=MIN_SAMPLES):
+    num_simulations, n_fixtures = outcomes.shape
+    n_teams = positions.shape[1]
+    hits = np.zeros((3, n_fixtures, len(zones) * n_teams))
+    counts = np.zeros((3, n_fixtures))
+    in_zone = np.zeros(len(zones) * n_teams)
+    for start in range(0, num_simulations, chunk):
+        league_positions = positions[start:start + chunk]
+        indicators = np.concatenate([(league_positions >= first - 1) & (league_positions <= last - 1)
+                                     for first, last in zones.values()], axis=1).astype(np.float32)
+        in_zone += indicators.sum(axis=0)
+        for o in range(3):
+            sampled = (outcomes[start:start + chunk] == o).astype(np.float32)
+            hits[o] += sampled.T @ indicators
+            counts[o] += sampled.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        conditional = hits / counts[:, :, None]
+    conditional[counts < min_samples] = np.nan
+    conditional = conditional.reshape(3, n_fixtures, len(zones), n_teams).transpose(1, 0, 2, 3)
+    zone_probs = (in_zone / max(num_simulations, 1)).reshape(len(zones), n_teams)
+    return conditional, zone_probs
+
+# Fixtures ranked by leverage on one zone, from saved distributions (see league_result).
+# For each fixture the team whose odds it moves most (or the given team): the swing between
+# its best and worst result and each outcome's shift from the team's current odds, in
+# percentage points. Returns None if the distributions have no leverage.
+def leverage_table(distributions, zone, team=None):
+    if "leverage" not in distributions:
+        return None
+    zones = [str(z) for z in distributions["leverage_zones"]]
+    teams = [str(t) for t in distributions["teams"]]
+    if zone not in zones:
+        raise KeyError(f"Unknown zone: {zone}. Available: {', '.join(zones)}")
+    z = zones.index(zone)
+    conditional = distributions["leverage"][:, :, z, :].astype(float) * 100  # (fixtures, 3, teams)
+    baseline = distributions["zone_probs"][z].astype(float) * 100
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # fixtures with no well-sampled outcome
+        swing = np.nan_to_num(np.nanmax(conditional, axis=1) - np.nanmin(conditional, axis=1))
+    if team is None:
+        t = np.argmax(swing, axis=1)
+    else:
+        if team not in teams:
+            raise KeyError(f"Unknown team: {team}")
+        t = np.full(len(swing), teams.index(team))
+    fixtures = np.arange(len(swing))
+    shifts = conditional[fixtures, :, t] - baseline[t][:, None]
+
+    table = pd.DataFrame({
+        "Date": distributions["fixture_dates"].astype(str),
+        "Home": distributions["fixture_home"].astype(str),
+        "Away": distributions["fixture_away"].astype(str),
+        "Team": np.array(teams)[t],
+        f"{zone} %": baseline[t].round(1),
+        "Swing": swing[fixtures, t].round(1),
+        **{outcome: shifts[:, o].round(1) for o, outcome in enumerate(OUTCOMES)},
+    })
+    return table.sort_values("Swing", ascending=False, kind="stable").reset_index(drop=True)
+
+def load_distributions(data_dir=DATA_DIR):
+    try:
+        with np.load(os.path.join(data_dir, "simulation_distributions.npz")) as npz:
+            return {key: npz[key] for key in npz.files}
+    except FileNotFoundError:
+        return None
+
+# Prints the top fixtures for each zone (or one zone); returns False without leverage data
+def print_leverage(data_dir=DATA_DIR, zone=None, team=None, top=10):
+    distributions = load_distributions(data_dir)
+    if distributions is None or "leverage" not in distributions:
+        print("No fixture leverage in simulation_distributions.npz. Run --simulate first.")
+        return False
+    for label in [zone] if zone else [str(z) for z in distributions["leverage_zones"]]:
+        table = leverage_table(distributions, label, team)
+        print("\n" + "="*60)
+        print(f"FIXTURES WITH THE MOST {label.upper()} LEVERAGE" + (f" FOR {team.upper()}" if team else ""))
+        print("="*60)
+        print(table.head(top).to_string(index=False))
+    print("\nSwing: difference between the team's odds after its best and worst result of the fixture (pp)."
+          "\nHome Win / Draw / Away Win: change from the current odds if the fixture ends that way (pp).")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixtures that matter most for each zone, from the last simulation")
+    parser.add_argument("--zone", help="One zone (e.g. Title); default: all")
+    parser.add_argument("--team", help="Leverage on this team's odds instead of the most affected team")
+    parser.add_argument("--top", type=int, default=10, help="Fixtures to show per zone")
+    args = parser.parse_args()
+    try:
+        print_leverage(zone=args.zone, team=args.team, top=args.top)
+    except KeyError as e:
+        raise SystemExit(e.args[0])
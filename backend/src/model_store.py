@@ -0,0 +1,31 @@
+# The trained prediction model on disk, so it can be reused without retraining
+# (e.g. preloaded by the web app). Saved by `main.py --predict`.
+#
+# The file holds everything predict_matches needs alongside the forest: the feature
+# table with rolling averages, the predictor names and the opponent code mapping.
+
+import joblib
+import os
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, 'output', 'model.joblib')
+
+def save_model(model, data, predictors, cols, new_cols, opp_mapping, path=MODEL_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({
+        "model": model,
+        "data": data,
+        "predictors": predictors,
+        "cols": cols,
+        "new_cols": new_cols,
+        "opp_mapping": opp_mapping,
+    }, tmp_path)
+    os.replace(tmp_path, path)
+
+# Returns the saved bundle (dict), or None if no model has been saved yet
+def load_model(path=MODEL_PATH):
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
@@ -0,0 +1,131 @@
+# Record/replay of fetched fbref pages, so the scrapers can run offline.
+#
+#   FBREF_MODE=record  - every page fetched through fetcher.fetch_page is saved with its URL
+#   FBREF_MODE=replay  - browser.get_driver() returns a ReplayDriver that serves the saved
+#                        pages instead of starting Chrome; nothing touches the network
+#   FBREF_MODE=live    - (default) normal scraping
+#
+# Recordings live in FBREF_RECORDINGS (default backend/output/recordings): one HTML file
+# per page plus an index.json that maps each URL to its file.
+
+from bs4 import BeautifulSoup
+from datetime import datetime
+import hashlib
+import json
+import os
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RECORDINGS_DIR = os.path.join(BASE_DIR, 'output', 'recordings')
+
+_mode = os.environ.get("FBREF_MODE", "live")
+_recordings_dir = os.environ.get("FBREF_RECORDINGS", DEFAULT_RECORDINGS_DIR)
+_store = None
+
+# Switches mode from code (e.g. the benchmark) instead of the environment
+def set_mode(mode, recordings_dir=None):
+    global _mode, _recordings_dir, _store
+    if mode not in ("live", "record", "replay"):
+        raise ValueError(f"Unknown FBREF_MODE: {mode}")
+    _mode = mode
+    if recordings_dir:
+        _recordings_dir = recordings_dir
+    _store = None
+
+def get_mode():
+    return _mode
+
+def replaying():
+    return _mode == "replay"
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = PageStore(_recordings_dir)
+    return _store
+
+# Saves a fetched page when recording; does nothing otherwise
+def record_page(url, html):
+    if _mode == "record":
+        get_store().save(url, html)
+
+# ---------------------------------------------------------
+# 1. PAGE STORE
+# ---------------------------------------------------------
+class PageStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def save(self, url, html):
+        os.makedirs(self.directory, exist_ok=True)
+        filename = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        with open(os.path.join(self.directory, filename), "w", encoding="utf-8") as f:
+            f.write(html)
+        self.index[url] = {"file": filename, "bytes": len(html), "fetched_at": datetime.now().isoformat(timespec="seconds")}
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+
+    def load(self, url):
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["file"]), encoding="utf-8") as f:
+            return f.read()
+
+# ---------------------------------------------------------
+# 2. REPLAY DRIVER
+# ---------------------------------------------------------
+# Stands in for the Selenium driver: supports the calls the scrapers make
+# (get, page_source, title, find_elements, execute_script, quit).
+class ReplayDriver:
+    def __init__(self, store):
+        self.store = store
+        self.current_url = None
+        self.page_source = "<html><head></head><body></body></html>"
+        self.pages_served = 0
+        self.pages_missing = 0
+        self._soup = None
+
+    def get(self, url):
+        self.current_url = url
+        html = self.store.load(url)
+        if html is None:
+            print(f"No recording for {url}")
+            self.pages_missing += 1
+            html = "<html><head></head><body></body></html>"
+        else:
+            self.pages_served += 1
+        self.page_source = html
+        self._soup = None
+
+    @property
+    def title(self):
+        title = self._parsed().title
+        return title.text.strip() if title else ""
+
+    def _parsed(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.page_source, "html.parser")
+        return self._soup
+
+    # Only CSS selectors are used by the scrapers
+    def find_elements(self, by, selector):
+        return self._parsed().select(selector)
+
+    # No browser timings offline
+    def execute_script(self, script, *args):
+        return None
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def quit(self):
+        pass
@@ -0,0 +1,113 @@
+# A small make-like runner for the pipeline stages in main.py.
+#
+# Each stage declares the files it reads and writes (plus any parameters that affect its
+# output). A stage runs only when it is stale:
+#   - one of its outputs is missing,
+#   - the content hash of an input (or a parameter) differs from its last successful run,
+#   - or it is forced (--force, or a stage with no inputs such as scraping, when asked for).
+# Hashes of the last successful run are kept in output/pipeline_state.json.
+
+from datetime import datetime
+import hashlib
+import json
+import os
+
+from atomic import write_json_atomic
+from profiling import Profiler
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = os.path.join(BASE_DIR, 'output', 'pipeline_state.json')
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Stage:
+    # inputs/outputs: lists of paths, or functions returning one (resolved when checked).
+    # run() returns False to stop the pipeline.
+    def __init__(self, name, run, inputs=(), outputs=(), params=None, description=""):
+        self.name = name
+        self.run = run
+        self._inputs = inputs
+        self._outputs = outputs
+        self.params = params or {}
+        self.description = description
+
+    def inputs(self):
+        return list(self._inputs() if callable(self._inputs) else self._inputs)
+
+    def outputs(self):
+        return list(self._outputs() if callable(self._outputs) else self._outputs)
+
+    # Content hashes of the inputs and the parameters
+    def fingerprint(self):
+        return {
+            "inputs": {os.path.basename(p): file_hash(p) if os.path.exists(p) else None for p in self.inputs()},
+            "params": self.params,
+        }
+
+class Pipeline:
+    def __init__(self, stages, state_file=STATE_FILE):
+        self.stages = stages
+        self.state_file = state_file
+        self.state = {}
+        if os.path.exists(state_file):
+            with open(state_file, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    # Why a stage has to run, or None if it is up to date
+    def reason(self, stage, force=False, upstream_ran=False):
+        if force:
+            return "forced"
+        if not stage.inputs():
+            return "no inputs to compare (external source)"
+        missing = [os.path.basename(p) for p in stage.outputs() if not os.path.exists(p)]
+        if missing:
+            return f"missing {', '.join(missing)}"
+        last = self.state.get(stage.name)
+        if last is None:
+            return "never run"
+        current = stage.fingerprint()
+        changed = [name for name, h in current["inputs"].items() if last["inputs"].get(name) != h]
+        if changed:
+            return f"changed {', '.join(changed)}"
+        if current["params"] != last["params"]:
+            return "parameters changed"
+        if upstream_ran:
+            return "upstream stage may change its inputs"
+        return None
+
+    # Runs the selected stages in pipeline order, skipping those that are up to date.
+    # With dry_run nothing runs: the plan is printed instead. Returns False if a stage failed.
+    # Each stage that runs is a section of profiler (see profiling.py), if one is given.
+    def run(self, selected, force=False, dry_run=False, profiler=None):
+        profiler = profiler or Profiler()
+        upstream_ran = False
+        for stage in self.stages:
+            if stage.name not in selected:
+                continue
+            reason = self.reason(stage, force=force, upstream_ran=dry_run and upstream_ran)
+            if reason is None:
+                print(f"[skip] {stage.name}: up to date")
+                continue
+            if dry_run:
+                print(f"[run]  {stage.name}: {reason}")
+                upstream_ran = True
+                continue
+
+            print("\n" + "="*40)
+            print(f"STAGE {stage.name.upper()}: {stage.description} ({reason})")
+            print("="*40)
+            with profiler.section(stage.name):
+                ok = stage.run() is not False
+            if not ok:
+                print(f"Stage {stage.name} failed. Aborting.")
+                return False
+            self.state[stage.name] = {**stage.fingerprint(), "ran_at": datetime.now().isoformat(timespec="seconds")}
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            write_json_atomic(self.state_file, self.state)
+        return True
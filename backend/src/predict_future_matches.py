@@ -1,15 +1,12 @@
 import pandas as pd
-import time
+import numpy as np
 import os
 from sklearn.ensemble import RandomForestClassifier
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+
+from fbref import SCHEDULE_URL, find_schedule_table, parse_schedule
+from fetcher import AdaptiveScheduler, fetch_page
+from browser import get_driver
+from atomic import write_csv_atomic
 
 # ---------------------------------------------------------
 # 1. SETUP & CONFIGURATION
@@ -38,90 +35,59 @@ def clean_team_name(name):
 # ---------------------------------------------------------
 # 2. SCRAPE UPCOMING FIXTURES
 # ---------------------------------------------------------
-def get_upcoming_fixtures():
+def get_upcoming_fixtures(use_cache=True, data_dir=DATA_DIR):
     # Check if fixtures are already saved to avoid re-scraping
-    try:
-        fixtures = pd.read_csv(os.path.join(DATA_DIR, "fixtures.csv"))
-        print("Loaded fixtures from fixtures.csv")
-        return fixtures
-    except FileNotFoundError:
-        pass
+    if use_cache:
+        try:
+            fixtures = pd.read_csv(os.path.join(data_dir, "fixtures.csv"))
+            print("Loaded fixtures from fixtures.csv")
+            return fixtures
+        except FileNotFoundError:
+            pass
 
     print("Scraping upcoming fixtures...")
     
-    options = Options()
-    # options.add_argument("--headless") 
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    
-    url = "https://fbref.com/en/comps/9/schedule/Premier-League-Scores-and-Fixtures"
+    # Shared, warm browser session (see browser.py) instead of a new Chrome per call
+    driver = get_driver()
     
     try:
-        driver.get(url)
-        time.sleep(5) # Wait for page to load
-        print(f"Page title: {driver.title}")
-        
-        # Wait for table
-        # Try 2024-2025 first, as that is the current season
-        try:
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "sched_2024-2025_9_1")))
-            table_id = "sched_2024-2025_9_1"
-        except:
-            # Fallback to 2025-2026 if the season rolled over
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "sched_2025-2026_9_1")))
-            table_id = "sched_2025-2026_9_1"
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        table = soup.find("table", id=table_id)
+        # Wait for whichever season's schedule table the page shows (e.g. sched_2025-2026_9_1)
+        soup = fetch_page(driver, SCHEDULE_URL, "table[id^='sched_']", AdaptiveScheduler(), label="schedule")
+        table = find_schedule_table(soup) if soup is not None else None
         
         fixtures = []
         if table and table.tbody:
-            for row in table.tbody.find_all("tr"):
-                # Skip spacer rows
-                if "spacer" in row.get("class", []):
-                    continue
-                
-                # Check if match is in the future (no result yet)
-                score_cell = row.find("td", {"data-stat": "score"})
-                if score_cell and not score_cell.text.strip():
-                    # This is a future match
-                    date = row.find("td", {"data-stat": "date"}).text.strip()
-                    home = row.find("td", {"data-stat": "home_team"}).text.strip()
-                    away = row.find("td", {"data-stat": "away_team"}).text.strip()
-                    
-                    if date and home and away:
-                        fixtures.append({
-                            "date": date,
-                            "home_team": clean_team_name(home),
-                            "away_team": clean_team_name(away)
-                        })
+            # Matches with no score yet are the upcoming fixtures
+            _, upcoming, _ = parse_schedule(table)
+            for row in upcoming.to_dict("records"):
+                fixtures.append({
+                    "date": row["date"],
+                    "home_team": clean_team_name(row["home_team"]),
+                    "away_team": clean_team_name(row["away_team"])
+                })
                         
         print(f"Found {len(fixtures)} upcoming matches.")
         df = pd.DataFrame(fixtures)
-        df.to_csv(os.path.join(DATA_DIR, "fixtures.csv"), index=False)
+        df.to_csv(os.path.join(data_dir, "fixtures.csv"), index=False)
         return df
         
     except Exception as e:
         print(f"Error scraping fixtures: {e}")
         return pd.DataFrame()
-    finally:
-        driver.quit()
 
 # ---------------------------------------------------------
 # 3. PREPARE DATA & TRAIN MODEL
 # ---------------------------------------------------------
-def train_model():
+# Match rows with the model features (season PPG, rolling form of the team and its opponent).
+# Returns (matches_rolling, full_predictors, cols, new_cols, opp_mapping).
+def build_features(data_dir=DATA_DIR):
     print("Loading historical data...")
     # Load past data
-    matches = pd.read_csv(os.path.join(DATA_DIR, 'matches_data.csv'))
+    matches = pd.read_csv(os.path.join(data_dir, 'matches_data.csv'))
     
     # Load current season played matches
     try:
-        current_season = pd.read_csv(os.path.join(DATA_DIR, 'future_matches_2025.csv'))
+        current_season = pd.read_csv(os.path.join(data_dir, 'future_matches_2025.csv'))
         # Align columns if necessary
         matches = pd.concat([matches, current_season], ignore_index=True)
     except FileNotFoundError:
@@ -186,20 +152,31 @@ def train_model():
     
     matches_rolling = matches_rolling.merge(opp_stats, on=["date", "opponent"], how="left")
     matches_rolling = matches_rolling.dropna()
-    
+
+    full_predictors = predictors + ["opp_season_ppg"] + new_cols + opp_new_cols
+    return matches_rolling, full_predictors, cols, new_cols, opp_mapping
+
+# Sample weight of each season, relative to the season being predicted
+# (for 2025: {2020: 0.5, 2021: 0.5, 2022: 1, 2023: 2, 2024: 4, 2025: 6})
+def season_weights(season=2025):
+    offsets = {0: 6, 1: 4, 2: 2, 3: 1, 4: 0.5, 5: 0.5}
+    return {season - offset: weight for offset, weight in offsets.items()}
+
+def fit_model(matches_rolling, full_predictors, season=2025):
     # Train Random Forest
     print("Training model...")
     # Use sample weights to favor recent seasons
     # Adjusted to balance Current Form (2025) with Historical Class (2023-24)
     # This prevents teams having a "hot start" (like Villa) from being overrated vs consistent giants (Arsenal)
-    season_weights = {2020: 0.5, 2021: 0.5, 2022: 1, 2023: 2, 2024: 4, 2025: 6}
-    sample_weights = matches_rolling["season"].map(season_weights).fillna(1)
+    sample_weights = matches_rolling["season"].map(season_weights(season)).fillna(1)
 
     rf = RandomForestClassifier(n_estimators=100, min_samples_split=10, random_state=1)
-    
-    full_predictors = predictors + ["opp_season_ppg"] + new_cols + opp_new_cols
     rf.fit(matches_rolling[full_predictors], matches_rolling["target"], sample_weight=sample_weights)
-    
+    return rf
+
+def train_model(data_dir=DATA_DIR):
+    matches_rolling, full_predictors, cols, new_cols, opp_mapping = build_features(data_dir)
+    rf = fit_model(matches_rolling, full_predictors)
     return rf, matches_rolling, full_predictors, cols, new_cols, opp_mapping
 
 # ---------------------------------------------------------
@@ -288,6 +265,95 @@ def predict_matches(fixtures, model, data, predictors, cols, new_cols, opp_mappi
         
     return pd.DataFrame(predictions)
 
+# ---------------------------------------------------------
+# 5. PAIR PROBABILITY TABLE
+# ---------------------------------------------------------
+# Latest form of every team: mean of the last 5 matches (the rolling stats for its next
+# match) and its current season PPG, one row per team
+def latest_team_features(data, cols, season=2025):
+    data = data.sort_values("date")
+    rolling = data.groupby("new_team")[cols].apply(lambda g: g.iloc[-5:].mean())
+    current = data[data["season"] == season]
+    ppg = current.groupby("new_team")["points"].mean()
+    rolling["season_ppg"] = ppg.reindex(rolling.index).fillna(0)
+    return rolling
+
+# Model inputs for a table of fixtures (Home, Away, day_code, hour) from each team's form
+# in features (see latest_team_features), in the predictor order
+def fixture_features(features, fixtures, predictors, cols, new_cols, opp_mapping):
+    home = features.loc[fixtures["Home"]].reset_index(drop=True)
+    away = features.loc[fixtures["Away"]].reset_index(drop=True)
+
+    X = pd.DataFrame({
+        "venue_code": 1, # Home
+        "opp_code": fixtures["Away"].map(opp_mapping).fillna(-1).astype(int).to_numpy(),
+        "hour": np.asarray(fixtures["hour"]),
+        "day_code": np.asarray(fixtures["day_code"]),
+        "season_ppg": home["season_ppg"],
+        "opp_season_ppg": away["season_ppg"],
+    })
+    for col, new_col in zip(cols, new_cols):
+        X[new_col] = home[col]
+        X[f"opp_{new_col}"] = away[col]
+    return X[predictors]
+
+# Outcome probabilities for a table of fixtures (Home, Away, day_code, hour), in a single
+# predict_proba call
+def predict_fixture_table(model, features, fixtures, predictors, cols, new_cols, opp_mapping):
+    X = fixture_features(features, fixtures, predictors, cols, new_cols, opp_mapping)
+
+    # 0=Loss, 1=Draw, 2=Win
+    probs = model.predict_proba(X)
+    table = fixtures.reset_index(drop=True).copy()
+    table["Home Win %"] = (probs[:, 2] * 100).round(2)
+    table["Draw %"] = (probs[:, 1] * 100).round(2)
+    table["Away Win %"] = (probs[:, 0] * 100).round(2)
+    table["Prediction"] = pd.Series(probs.argmax(axis=1)).map({0: "Away Win", 1: "Draw", 2: "Home Win"})
+    return table
+
+# Outcome probabilities for every ordered (home, away) pair of current clubs (20x19),
+# built with a single predict_proba call. Kick-off is assumed to be Saturday 3pm.
+def predict_all_pairs(model, data, predictors, cols, new_cols, opp_mapping, season=2025, day_code=5, hour=15):
+    print("\nPredicting all home/away pairs...")
+    teams = sorted(data.loc[data["season"] == season, "new_team"].unique())
+    features = latest_team_features(data, cols, season).loc[teams]
+
+    pairs = pd.DataFrame([(home, away) for home in teams for away in teams if home != away], columns=["Home", "Away"])
+    pairs["day_code"] = day_code
+    pairs["hour"] = hour
+    pairs = predict_fixture_table(model, features, pairs, predictors, cols, new_cols, opp_mapping)
+    return pairs.drop(columns=["day_code", "hour"])
+
+def save_pair_table(pairs, data_dir=DATA_DIR):
+    write_csv_atomic(pairs, os.path.join(data_dir, "pair_probabilities.csv"))
+
+# ---------------------------------------------------------
+# 6. PER-TREE PROBABILITIES
+# ---------------------------------------------------------
+# The forest's predict_proba is the mean of its trees' probabilities. Keeping every tree's
+# vector lets the simulation draw a tree (or a bootstrap of trees) per simulated season,
+# so the odds also reflect how much the trees disagree (see project_standings.py).
+# Returns a (trees, fixtures, 3) float16 array of [home win, draw, away win] for the
+# fixtures in predictions (the output of predict_matches), in the same order.
+def predict_tree_probabilities(predictions, model, data, predictors, cols, new_cols, opp_mapping, season=2025, hour=15):
+    fixtures = pd.DataFrame({
+        "Home": predictions["Home"].to_numpy(),
+        "Away": predictions["Away"].to_numpy(),
+        "day_code": pd.to_datetime(predictions["Date"]).dt.dayofweek.to_numpy(),
+        "hour": hour,
+    })
+    features = latest_team_features(data, cols, season)
+    X = fixture_features(features, fixtures, predictors, cols, new_cols, opp_mapping).to_numpy(dtype=np.float32)
+    # 0=Loss, 1=Draw, 2=Win -> [home win, draw, away win]
+    return np.stack([tree.predict_proba(X)[:, [2, 1, 0]] for tree in model.estimators_]).astype(np.float16)
+
+def save_tree_probabilities(predictions, tree_probs, data_dir=DATA_DIR):
+    path = os.path.join(data_dir, "tree_probabilities.npz")
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, dates=predictions["Date"].to_numpy(dtype=str), home=predictions["Home"].to_numpy(dtype=str),
+                        away=predictions["Away"].to_numpy(dtype=str), probs=tree_probs)
+    os.replace(tmp_path, path)
+
 # ---------------------------------------------------------
 # MAIN EXECUTION
 # ---------------------------------------------------------
@@ -308,7 +374,11 @@ if __name__ == "__main__":
         print(results.to_string(index=False))
         
         # Save
-        results.to_csv(os.path.join(DATA_DIR, "upcoming_predictions.csv"), index=False)
+        write_csv_atomic(results, os.path.join(DATA_DIR, "upcoming_predictions.csv"))
         print("\nSaved to upcoming_predictions.csv")
+
+        # 4. Every home/away pair, for on-demand head-to-head lookups
+        save_pair_table(predict_all_pairs(rf_model, historical_data, predictors, cols, new_cols, opp_mapping))
+        print("Saved to pair_probabilities.csv")
     else:
         print("No upcoming fixtures found.")
@@ -0,0 +1,84 @@
+# Wall time, CPU time and peak memory of the pipeline stages (main.py --profile).
+#
+#     profiler = Profiler(enabled=True, cprofile_dir="output/profiles")
+#     with profiler.section("predict"):
+#         with profiler.section("build_features"):
+#             ...
+#     print(profiler.summary())
+#
+# Sections nest: a stage's sub-steps show indented under it in the summary. Peak memory is
+# what tracemalloc saw above the section's starting point (Python allocations only, and
+# tracing slows the run down, so compare profiled runs with each other).
+# With cprofile_dir, each top-level section also dumps cProfile stats to <name>.prof
+# (read with `python -m pstats` or snakeviz). Only one cProfile can run at a time, so
+# nested sections are covered by their stage's dump.
+# A disabled profiler's sections do nothing, so stages can always use them.
+
+import cProfile
+from contextlib import contextmanager
+import os
+import time
+import tracemalloc
+
+class Profiler:
+    def __init__(self, enabled=False, cprofile_dir=None):
+        self.enabled = enabled
+        self.cprofile_dir = cprofile_dir
+        # Finished sections in start order: dicts with name, depth, wall_s, cpu_s, peak_mb
+        self.sections = []
+        self._stack = []
+        self._started_tracing = False
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        if not self._stack:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+        else:
+            # The enclosing section keeps the highest peak seen before this one resets it
+            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        start_memory = tracemalloc.get_traced_memory()[0]
+        entry = {"name": name, "depth": len(self._stack), "peak": start_memory}
+        self.sections.append(entry)
+        self._stack.append(entry)
+
+        profile = None
+        if self.cprofile_dir and entry["depth"] == 0:
+            profile = cProfile.Profile()
+            profile.enable()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry["wall_s"] = time.perf_counter() - wall
+            entry["cpu_s"] = time.process_time() - cpu
+            if profile is not None:
+                profile.disable()
+                os.makedirs(self.cprofile_dir, exist_ok=True)
+                entry["cprofile"] = os.path.join(self.cprofile_dir, f"{name}.prof")
+                profile.dump_stats(entry["cprofile"])
+
+            peak = max(entry.pop("peak"), tracemalloc.get_traced_memory()[1])
+            entry["peak_mb"] = (peak - start_memory) / 1e6
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            elif self._started_tracing:
+                tracemalloc.stop()
+
+    # Table of the finished sections with their share of the total wall time
+    def summary(self):
+        total = sum(s["wall_s"] for s in self.sections if s["depth"] == 0)
+        lines = [f"{'section':<28}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'% wall':>9}"]
+        for s in self.sections:
+            label = "  " * s["depth"] + s["name"]
+            share = 100 * s["wall_s"] / total if total else 0.0
+            lines.append(f"{label:<28}{s['wall_s']:>10.2f}{s['cpu_s']:>10.2f}{s['peak_mb']:>10.1f}{share:>8.1f}%")
+        lines.append(f"{'total':<28}{total:>10.2f}{sum(s['cpu_s'] for s in self.sections if s['depth'] == 0):>10.2f}")
+        return "\n".join(lines)
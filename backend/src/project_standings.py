@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
+import warnings
 import os
 
+from atomic import write_csv_atomic
+from projection_history import ProjectionHistory, data_hash
+from leverage import fixture_leverage
+
 # ---------------------------------------------------------
 # 1. CONFIGURATION
 # ---------------------------------------------------------
@@ -29,10 +34,22 @@ def clean_team_name(name):
 # ---------------------------------------------------------
 # 2. CALCULATE CURRENT STANDINGS
 # ---------------------------------------------------------
-def get_current_standings():
+# Results come from results_2025.csv (written from the schedule page in one fetch by
+# scrape_future.py), falling back to the full future_matches_2025.csv match logs.
+def results_path(data_dir=DATA_DIR):
+    path = os.path.join(data_dir, "results_2025.csv")
+    if not os.path.exists(path):
+        path = os.path.join(data_dir, "future_matches_2025.csv")
+    return path
+
+# Files the simulation reads: current results and the fixture probabilities
+def simulation_inputs(data_dir=DATA_DIR):
+    return [results_path(data_dir), os.path.join(data_dir, "upcoming_predictions.csv")]
+
+def get_current_standings(data_dir=DATA_DIR):
     print("Calculating current standings...")
     try:
-        df = pd.read_csv(os.path.join(DATA_DIR, "future_matches_2025.csv"))
+        df = pd.read_csv(results_path(data_dir))
     except FileNotFoundError:
         print("Error: future_matches_2025.csv not found.")
         return pd.DataFrame()
@@ -64,15 +81,57 @@ def get_current_standings():
     return standings
 
 # ---------------------------------------------------------
-# 3. MONTE CARLO SIMULATION
+# 3. LEAGUE FORMATS
 # ---------------------------------------------------------
-def run_monte_carlo_simulation(current_standings, num_simulations=1000):
-    print(f"Running {num_simulations} Monte Carlo simulations...")
+# Format of a league: number of teams, games per team and finishing-position zones.
+# Zones map a label to an inclusive range of positions (1 = top); each becomes a
+# "<label> %" column in the projected table.
+class LeagueConfig:
+    def __init__(self, name, teams, games, zones):
+        self.name = name
+        self.teams = teams
+        self.games = games
+        self.zones = zones
+        for label, (first, last) in zones.items():
+            if not 1 <= first <= last <= teams:
+                raise ValueError(f"{name}: zone {label} ({first}-{last}) is outside positions 1-{teams}")
+
+    # The same league with another number of teams: zones at the bottom of the table
+    # (e.g. relegation) move with its end, the others keep their positions
+    def resized(self, teams):
+        zones = {}
+        for label, (first, last) in self.zones.items():
+            if last == self.teams:
+                first, last = max(first + teams - self.teams, 1), teams
+            zones[label] = (first, min(last, teams))
+        return LeagueConfig(self.name, teams, self.games, zones)
+
+PREMIER_LEAGUE = LeagueConfig("Premier League", teams=20, games=38,
+                              zones={"Title": (1, 1), "Top 4": (1, 4), "Relegation": (18, 20)})
+
+# e.g. the EFL Championship: 24 teams, 46 games, automatic promotion and playoff places
+CHAMPIONSHIP = LeagueConfig("Championship", teams=24, games=46,
+                            zones={"Title": (1, 1), "Automatic Promotion": (1, 2), "Playoffs": (3, 6), "Relegation": (22, 24)})
+
+# ---------------------------------------------------------
+# 4. MONTE CARLO SIMULATION
+# ---------------------------------------------------------
+# Sharpen probabilities to reflect realistic dominance (favorites win more often)
+# This helps fix the "low point total" issue caused by conservative raw probabilities.
+# Moderate sharpening (1.85) balances top-team dominance with underdog chances: bottom
+# teams don't lose *every* game while title contenders stay strong.
+# probs: [home win, draw, away win], or an (n, 3) array of them
+def sharpen_probabilities(probs, power=1.85):
+    probs = np.power(probs, power)
+    return probs / probs.sum(axis=-1, keepdims=True)
+
+# Fixture probabilities from upcoming_predictions.csv, or None if the file is missing
+def load_fixture_probabilities(data_dir=DATA_DIR):
     try:
-        preds = pd.read_csv(os.path.join(DATA_DIR, "upcoming_predictions.csv"))
+        preds = pd.read_csv(os.path.join(data_dir, "upcoming_predictions.csv"))
     except FileNotFoundError:
         print("Error: upcoming_predictions.csv not found.")
-        return pd.DataFrame()
+        return None
 
     # Prepare data for simulation
     matches = []
@@ -81,95 +140,326 @@ def run_monte_carlo_simulation(current_standings, num_simulations=1000):
         p_draw = float(row["Draw %"].strip('%')) / 100
         p_away = float(row["Away Win %"].strip('%')) / 100
         
-        # Sharpen probabilities to reflect realistic dominance (favorites win more often)
-        # This helps fix the "low point total" issue caused by conservative raw probabilities
-        probs = np.array([p_home, p_draw, p_away])
-        
-        # Apply moderate sharpening (1.85) to balance top-team dominance with underdog chances
-        # This prevents bottom teams from losing *every* game while keeping title contenders strong
-        probs = np.power(probs, 1.85) 
-        probs = probs / probs.sum()
+        probs = sharpen_probabilities(np.array([p_home, p_draw, p_away]))
         
         matches.append({
+            "Date": row["Date"],
             "Home": row["Home"],
             "Away": row["Away"],
             "Probs": probs # [Home Win, Draw, Away Win]
         })
+    return matches
+
+# Uniform draws that decide the fixture outcomes, one row per simulation:
+#   "plain":      independent pseudo-random numbers
+#   "antithetic": pairs u, 1 - u (a season and its mirror image, where upsets and
+#                 favourites' wins swap), which cancels part of the noise
+#   "stratified": Latin hypercube per batch: every fixture's draws cover [0, 1) evenly
+#   "sobol":      scrambled Sobol quasi-random points, continued across batches
+# Sobol and stratified draws are not independent, so their error is measured across
+# repeated runs (benchmarks/bench_variance.py), not from one run's spread.
+SAMPLING_MODES = ("plain", "antithetic", "stratified", "sobol")
+
+class UniformSampler:
+    def __init__(self, mode, dimensions, rng):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        self.mode = mode
+        self.dimensions = dimensions
+        self.rng = rng
+        if mode == "sobol":
+            from scipy.stats import qmc
+            self.engine = qmc.Sobol(dimensions, scramble=True, seed=rng)
+
+    def draw(self, n):
+        if self.mode == "antithetic":
+            u = self.rng.random(((n + 1) // 2, self.dimensions))
+            return np.concatenate([u, 1 - u])[:n]
+        if self.mode == "stratified":
+            from scipy.stats import qmc
+            return qmc.LatinHypercube(self.dimensions, seed=self.rng).random(n)
+        if self.mode == "sobol":
+            with warnings.catch_warnings():
+                # Balance properties hold for powers of two; batches need not be
+                warnings.simplefilter("ignore", UserWarning)
+                return self.engine.random(n)
+        return self.rng.random((n, self.dimensions))
+
+# Simulates the rest of the season for several leagues at once.
+# leagues: list of (LeagueConfig, {team: current points}, fixtures) where fixtures are dicts
+# with Home, Away, Probs ([home win, draw, away win]) and optionally Date.
+#
+# All leagues are simulated in one batched array pass: every fixture of every league is one
+# column, its outcome is read off a single uniform draw (home win below p_home, draw below
+# p_home + p_draw), and points are accumulated with fixture -> team incidence matrices.
+# Finishing positions come from one argsort over a (simulations, leagues, teams) array,
+# padded for leagues with fewer teams; ties on points are broken at random.
+#
+# prob_sampler, if given, replaces the fixed probabilities: called as prob_sampler(n, rng)
+# for each batch, it returns (n, fixtures, 3) probabilities, one set per simulation (e.g.
+# drawn from the forest's trees, see ModelUncertainty).
+#
+# sampling picks how the uniform draws are made (see UniformSampler). With
+# control_variates, the zone probabilities are corrected with the teams' simulated points,
+# whose exact expectation is known from the fixture probabilities (not with prob_sampler),
+# and Projected Points is that exact expectation.
+#
+# Returns {league name: table}, or with return_distributions=True
+# {league name: (table, distributions)} (see save_projections).
+def simulate_leagues(leagues, num_simulations=1000, progress=None, return_distributions=False, rng=None, batch_size=250,
+                     prob_sampler=None, sampling="plain", control_variates=False):
+    rng = rng if rng is not None else np.random.default_rng()
+    if control_variates and prob_sampler is not None:
+        raise ValueError("control_variates needs fixed fixture probabilities (no prob_sampler)")
+
+    # Global team and fixture arrays over all leagues
+    team_names, base_points, layout, fixtures = [], [], [], []
+    league_fixtures = []
+    for config, points, league_matches in leagues:
+        if len(points) != config.teams:
+            raise ValueError(f"{config.name}: expected {config.teams} teams, got {len(points)}")
+        offset = len(team_names)
+        index = {team: offset + i for i, team in enumerate(points)}
+        team_names += list(points)
+        base_points += [points[team] for team in points]
+        layout.append(list(range(offset, offset + len(points))))
+        first = len(fixtures)
+        # Fixtures against teams outside the table only count for the side that is in it
+        fixtures += [(index.get(m["Home"], -1), index.get(m["Away"], -1), m) for m in league_matches]
+        league_fixtures.append(range(first, len(fixtures)))
+
+    n_teams, n_fixtures = len(team_names), len(fixtures)
+    home_idx = np.array([f[0] for f in fixtures], dtype=int)
+    away_idx = np.array([f[1] for f in fixtures], dtype=int)
+    probs = np.array([f[2]["Probs"] for f in fixtures], dtype=float).reshape(n_fixtures, 3)
+    cum_home = probs[:, 0]
+    cum_draw = probs[:, 0] + probs[:, 1]
+
+    home_incidence = np.zeros((n_fixtures, n_teams))
+    away_incidence = np.zeros((n_fixtures, n_teams))
+    home_incidence[np.nonzero(home_idx >= 0)[0], home_idx[home_idx >= 0]] = 1
+    away_incidence[np.nonzero(away_idx >= 0)[0], away_idx[away_idx >= 0]] = 1
+    base_points = np.array(base_points, dtype=float)
+    # Exact expected final points of every team
+    expected_points = (base_points + (3 * probs[:, 0] + probs[:, 1]) @ home_incidence
+                       + (3 * probs[:, 2] + probs[:, 1]) @ away_incidence)
+    sampler = UniformSampler(sampling, n_fixtures, rng)
+
+    final_points = np.empty((num_simulations, n_teams), dtype=np.int16)
+    outcome_counts = np.zeros((n_fixtures, 3), dtype=np.int32)
+    # Every simulated result (0 = home win, 1 = draw, 2 = away win), for the fixture leverage
+    outcomes = np.empty((num_simulations, n_fixtures), dtype=np.int8) if return_distributions else None
+    for start in range(0, num_simulations, batch_size):
+        if progress is not None:
+            progress(start, num_simulations)
+        n = min(batch_size, num_simulations - start)
+        u = sampler.draw(n)
+        if prob_sampler is not None:
+            sampled = prob_sampler(n, rng)
+            cum_home, cum_draw = sampled[:, :, 0], sampled[:, :, 0] + sampled[:, :, 1]
+        home_win = u < cum_home
+        draw = ~home_win & (u < cum_draw)
+        away_win = ~home_win & ~draw
+        points = base_points + (3 * home_win + draw) @ home_incidence + (3 * away_win + draw) @ away_incidence
+        final_points[start:start + n] = points
+        outcome_counts += np.stack([home_win.sum(axis=0), draw.sum(axis=0), away_win.sum(axis=0)], axis=1)
+        if outcomes is not None:
+            outcomes[start:start + n] = draw + 2 * away_win
+
+    positions = finishing_positions(final_points, layout, rng)
+    results = {}
+    for l, (config, points, _) in enumerate(leagues):
+        matches = [fixtures[m][2] for m in league_fixtures[l]]
+        results[config.name] = league_result(config, points, matches, final_points[:, layout[l]],
+                                             positions[:, l, :len(layout[l])],
+                                             outcome_counts[league_fixtures[l].start:league_fixtures[l].stop],
+                                             return_distributions,
+                                             expected_points[layout[l]] if control_variates else None,
+                                             outcomes[:, league_fixtures[l]] if outcomes is not None else None)
+    return results
+
+# Finishing positions (0 = top) of every league in one pass: final_points is
+# (simulations, teams) and layout lists each league's team columns. Returns a
+# (simulations, leagues, max teams) array; padding slots sort last, ties on points are
+# broken at random.
+def finishing_positions(final_points, layout, rng):
+    max_teams = max(len(slots) for slots in layout)
+    padded_layout = np.array([slots + [-1] * (max_teams - len(slots)) for slots in layout])
+    keys = np.where(padded_layout >= 0, final_points[:, padded_layout], -np.inf)
+    keys = keys + rng.random(keys.shape) * 0.5  # random tie-break between equal points
+    return np.argsort(np.argsort(-keys, axis=2), axis=2)
+
+# Projected table of one league from its simulated final points and positions
+# (simulations x teams, in the order of points), and optionally its distributions.
+# expected_points (exact, per team) turns on the control variate correction; outcomes
+# (simulations x fixtures, see simulate_leagues) adds the fixture leverage.
+def league_result(config, points, matches, league_points, league_positions, outcome_counts, return_distributions=False,
+                  expected_points=None, outcomes=None):
+    num_simulations = len(league_points)
+    zone_probs = {label: ((league_positions >= first - 1) & (league_positions <= last - 1)).mean(axis=0)
+                  for label, (first, last) in config.zones.items()} if num_simulations else {}
+    mean_points = league_points.mean(axis=0) if num_simulations else None
+    if expected_points is not None and num_simulations > 1:
+        zone_probs = control_variate_estimates(league_points, league_positions, config.zones, expected_points)
+        mean_points = expected_points
 
-    # Initialize accumulators
-    team_stats = {team: {"Points": 0} for team in current_standings.keys()}
-    
-    # Track finishing positions
-    # title_count: How many times team finished 1st
-    # top4_count: How many times team finished 1st-4th
-    # relegation_count: How many times team finished 18th-20th
-    counts = {team: {"Title": 0, "Top4": 0, "Relegation": 0} for team in current_standings.keys()}
-    
-    # Run Simulations
-    for i in range(num_simulations):
-        # Temp stats for this single simulation
-        sim_points = {team: current_standings[team]["Points"] for team in current_standings}
-        
-        for match in matches:
-            home = match["Home"]
-            away = match["Away"]
-            probs = match["Probs"]
-            
-            outcome = np.random.choice([0, 1, 2], p=probs)
-            
-            if outcome == 0: # Home Win
-                if home in sim_points: sim_points[home] += 3
-            elif outcome == 1: # Draw
-                if home in sim_points: sim_points[home] += 1
-                if away in sim_points: sim_points[away] += 1
-            else: # Away Win
-                if away in sim_points: sim_points[away] += 3
-
-        # Accumulate total points for averaging later
-        for team, pts in sim_points.items():
-            team_stats[team]["Points"] += pts
-            
-        # Determine rankings for this simulation
-        # Sort by points (descending)
-        # Note: This simple sort doesn't handle Goal Difference tie-breakers perfectly, 
-        # but points are the primary factor.
-        sorted_sim = sorted(sim_points.items(), key=lambda x: x[1], reverse=True)
-        
-        # Update counts based on rank
-        for rank, (team, pts) in enumerate(sorted_sim):
-            # Rank is 0-indexed (0 = 1st place)
-            if rank == 0:
-                counts[team]["Title"] += 1
-            if rank < 4:
-                counts[team]["Top4"] += 1
-            if rank >= 17: # 18th, 19th, 20th (in a 20 team league)
-                counts[team]["Relegation"] += 1
-
-    # Compile Final Data
     final_data = []
-    for team, stats in team_stats.items():
-        current = current_standings[team]
-        
-        avg_pts = stats["Points"] / num_simulations
-        
-        title_prob = (counts[team]["Title"] / num_simulations) * 100
-        top4_prob = (counts[team]["Top4"] / num_simulations) * 100
-        rel_prob = (counts[team]["Relegation"] / num_simulations) * 100
-        
-        final_data.append({
+    for i, team in enumerate(points):
+        row = {
             "Team": team,
-            "Played": 38,
-            "Current Points": current["Points"],
-            "Projected Points": round(avg_pts),
-            "Title %": round(title_prob, 1),
-            "Top 4 %": round(top4_prob, 1),
-            "Relegation %": round(rel_prob, 1)
+            "Played": config.games,
+            "Current Points": points[team],
+            "Projected Points": round(float(mean_points[i])) if num_simulations else points[team],
+        }
+        for label in config.zones:
+            row[f"{label} %"] = round(float(zone_probs[label][i]) * 100, 1) if num_simulations else 0.0
+        final_data.append(row)
+    table = pd.DataFrame(final_data)
+
+    if not return_distributions:
+        return table
+
+    n_teams = len(points)
+    max_points = int(league_points.max()) if num_simulations else 0
+    distributions = {
+        "teams": np.array(list(points)),
+        "num_simulations": np.array(num_simulations),
+        # points_hist[t, p]: simulations in which team t finished on p points
+        "points_hist": np.stack([np.bincount(league_points[:, i], minlength=max_points + 1) for i in range(n_teams)]),
+        # position_counts[t, r]: simulations in which team t finished in position r + 1
+        "position_counts": np.stack([np.bincount(league_positions[:, i], minlength=n_teams) for i in range(n_teams)]).astype(np.int32),
+        "fixture_dates": np.array([str(m.get("Date", "")) for m in matches]),
+        "fixture_home": np.array([m["Home"] for m in matches]),
+        "fixture_away": np.array([m["Away"] for m in matches]),
+        # outcome_counts[m, o]: simulations in which fixture m ended home win / draw / away win
+        "outcome_counts": outcome_counts,
+    }
+    if outcomes is not None and num_simulations:
+        conditional, zone_probs = fixture_leverage(outcomes, league_positions, config.zones)
+        distributions.update({
+            "leverage_zones": np.array(list(config.zones)),
+            # leverage[m, o, z, t]: share of the simulations with outcome o of fixture m in
+            # which team t finished in zone z (see leverage.py)
+            "leverage": conditional.astype(np.float16),
+            "zone_probs": zone_probs.astype(np.float32),
         })
+    return table, distributions
+
+# Zone probabilities with every team's final points as control variates: the simulated
+# mean of each zone indicator is corrected by the regression of the indicator on the
+# points' deviation from their exact expectation (all teams at once, one least squares).
+def control_variate_estimates(league_points, league_positions, zones, expected_points):
+    deviation = league_points - expected_points
+    centered = deviation - deviation.mean(axis=0)
+    indicators = np.concatenate([((league_positions >= first - 1) & (league_positions <= last - 1))
+                                 for first, last in zones.values()], axis=1).astype(float)
+    beta = np.linalg.lstsq(centered, indicators - indicators.mean(axis=0), rcond=None)[0]
+    estimates = np.clip(indicators.mean(axis=0) - deviation.mean(axis=0) @ beta, 0, 1)
+    n_teams = league_points.shape[1]
+    return {label: estimates[z * n_teams:(z + 1) * n_teams] for z, label in enumerate(zones)}
+
+# Model uncertainty from the per-tree probabilities saved by the prediction stage
+# (tree_probabilities.npz, see predict_future_matches.py). Each simulated season plays all
+# its fixtures with the probabilities of:
+#   "tree":      one tree drawn at random (the trees' full disagreement)
+#   "bootstrap": a bootstrap resample of the trees, averaged (uncertainty of the forest's
+#                mean; closer to the plain forest probabilities)
+# Draws are matrix products over the stored array; no model is needed at simulation time.
+UNCERTAINTY_MODES = ("tree", "bootstrap")
+
+class ModelUncertainty:
+    def __init__(self, tree_probs, mode="bootstrap"):
+        if mode not in UNCERTAINTY_MODES:
+            raise ValueError(f"Unknown uncertainty mode: {mode}")
+        self.mode = mode
+        # (trees, fixtures, 3)
+        self.tree_probs = tree_probs.astype(np.float64)
+        self.n_trees = len(tree_probs)
+
+    # Loads the per-tree array for the given fixtures (dicts with Date, Home, Away, in
+    # simulation order); None if it is missing or was saved for other fixtures
+    @classmethod
+    def load(cls, matches, mode="bootstrap", data_dir=DATA_DIR):
+        path = os.path.join(data_dir, "tree_probabilities.npz")
+        if not os.path.exists(path):
+            print("tree_probabilities.npz not found; run the prediction stage first.")
+            return None
+        with np.load(path) as npz:
+            saved = {(d, h, a): i for i, (d, h, a) in enumerate(zip(npz["dates"], npz["home"], npz["away"]))}
+            keys = [(str(m["Date"]), m["Home"], m["Away"]) for m in matches]
+            if any(key not in saved for key in keys):
+                print("tree_probabilities.npz does not match upcoming_predictions.csv; re-run the prediction stage.")
+                return None
+            return cls(npz["probs"][:, [saved[key] for key in keys]], mode)
+
+    # Probabilities for n simulations, sharpened like the averaged ones: (n, fixtures, 3)
+    def __call__(self, n, rng):
+        if self.mode == "tree":
+            return sharpen_probabilities(self.tree_probs[rng.integers(self.n_trees, size=n)])
+        # Bootstrap: how many times each tree is drawn, per simulation
+        weights = rng.multinomial(self.n_trees, np.full(self.n_trees, 1 / self.n_trees), size=n) / self.n_trees
+        return sharpen_probabilities(np.tensordot(weights, self.tree_probs, axes=1))
+
+# Projects the final table of one league (the Premier League by default) from the current
+# standings and the fixture probabilities in upcoming_predictions.csv.
+# progress, if given, is called as progress(done, total) as batches of simulations finish.
+# With return_distributions=True, returns (table, distributions): the per-team arrays behind
+# the table (see save_projections), for the team drill-down pages. Without
+# upcoming_predictions.csv the table is empty (and the distributions None).
+# uncertainty ("tree" or "bootstrap", see ModelUncertainty) draws each season's
+# probabilities from the forest's trees instead of using the averaged ones; sampling and
+# control_variates reduce the simulation noise (see simulate_leagues).
+def run_monte_carlo_simulation(current_standings, num_simulations=1000, progress=None, return_distributions=False,
+                               data_dir=DATA_DIR, config=PREMIER_LEAGUE, uncertainty=None, sampling="plain",
+                               control_variates=False, rng=None):
+    print(f"Running {num_simulations} Monte Carlo simulations...")
+    matches = load_fixture_probabilities(data_dir)
+    if matches is None:
+        return (pd.DataFrame(), None) if return_distributions else pd.DataFrame()
+
+    prob_sampler = None
+    if uncertainty:
+        prob_sampler = ModelUncertainty.load(matches, uncertainty, data_dir)
+        if prob_sampler is None:
+            print("Falling back to the averaged probabilities.")
+        elif control_variates:
+            print("Control variates need fixed probabilities; turned off for the uncertainty simulation.")
+            control_variates = False
+
+    points = {team: current_standings[team]["Points"] for team in current_standings}
+    if len(points) != config.teams:
+        # Usually a club spelled differently in the results and the predictions; simulate
+        # the table as it is rather than failing, but say which names do not line up
+        fixture_teams = {m["Home"] for m in matches} | {m["Away"] for m in matches}
+        print(f"Warning: the table has {len(points)} teams, {config.name} has {config.teams}.")
+        if set(points) - fixture_teams:
+            print(f"  In the table but in no remaining fixture: {', '.join(sorted(set(points) - fixture_teams))}")
+        if fixture_teams - set(points):
+            print(f"  In fixtures but not in the table: {', '.join(sorted(fixture_teams - set(points)))}")
+        config = config.resized(len(points))
+    results = simulate_leagues([(config, points, matches)], num_simulations=num_simulations,
+                               progress=progress, return_distributions=return_distributions, prob_sampler=prob_sampler,
+                               sampling=sampling, control_variates=control_variates, rng=rng)
+    return results[config.name]
 
-    return pd.DataFrame(final_data)
+# Publishes projections by atomic rename, so the web app never reads a half-written file.
+# Distributions (from return_distributions=True) go to simulation_distributions.npz.
+# Every published table is also appended to the projection history (data/history, see
+# projection_history.py) with the hash of the simulation inputs.
+def save_projections(final_table, data_dir=DATA_DIR, distributions=None, num_simulations=None):
+    if distributions is not None:
+        path = os.path.join(data_dir, "simulation_distributions.npz")
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, **distributions)
+        os.replace(tmp_path, path)
+        if num_simulations is None:
+            num_simulations = int(distributions["num_simulations"])
+    write_csv_atomic(final_table, os.path.join(data_dir, "projected_standings.csv"))
+    ProjectionHistory(os.path.join(data_dir, "history")).append(
+        final_table, data_hash=data_hash(simulation_inputs(data_dir)), num_simulations=num_simulations or 0)
 
 # ---------------------------------------------------------
-# 4. MAIN EXECUTION
+# 5. MAIN EXECUTION
 # ---------------------------------------------------------
 if __name__ == "__main__":
     # 1. Get Current Table
@@ -178,7 +468,9 @@ if __name__ == "__main__":
     if current_dict:
         # 2. Run Monte Carlo
         # Running 10,000 simulations to get a robust average of final standings.
-        final_table = run_monte_carlo_simulation(current_dict, num_simulations=5000)
+        final_table, distributions = run_monte_carlo_simulation(current_dict, num_simulations=5000, return_distributions=True)
+        if final_table.empty:
+            raise SystemExit("No fixture predictions to simulate. Run the prediction step first.")
         
         # Sort
         final_table = final_table.sort_values("Projected Points", ascending=False)
@@ -191,5 +483,5 @@ if __name__ == "__main__":
         print(final_table[cols].to_string(index=False))
         
         # Save
-        final_table.to_csv(os.path.join(DATA_DIR, "projected_standings.csv"), index=False)
+        save_projections(final_table, distributions=distributions)
         print("\nSaved to projected_standings.csv")
@@ -0,0 +1,260 @@
+# Append-only history of every projection run, so the movement of title and relegation
+# odds over the season can be queried without replaying old simulations.
+#
+#     history = ProjectionHistory(os.path.join(DATA_DIR, "history"))
+#     history.append(table, data_hash="...", num_simulations=5000)
+#     history.team_series("Arsenal", ["Title %"])   # {"run_time": [...], "Title %": [...]}
+#
+# Storage is columnar: one flat binary file per column under data/history/, plus
+# manifest.json with the row counts, the team dictionary and the column files.
+#   runs (one entry per run):  run_time (unix seconds), data_hash, simulations, first_row
+#   rows (one per team per run): run, team (id in the team dictionary), then one float32
+#                                file per numeric column of the table ("Title %", ...)
+# A query reads the small team column to find its rows (kept as an in-memory index and
+# extended as runs are added) and then only the requested columns, memory-mapped.
+#
+# Appends write the column files first and the manifest last (atomic rename), so readers
+# never see a half-appended run; bytes past the manifest counts (a crashed append) are cut
+# off by the next append. Appends from several processes are serialized with a file lock.
+
+from datetime import datetime, timezone
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from atomic import write_json_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock (single-process dev server)
+    fcntl = None
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+HISTORY_DIR = os.path.join(DATA_DIR, 'history')
+
+RUN_COLUMNS = {
+    "run_time": np.dtype("<i8"),
+    "data_hash": np.dtype("S40"),
+    "simulations": np.dtype("<i4"),
+    "first_row": np.dtype("<i8"),
+}
+ROW_COLUMNS = {
+    "run": np.dtype("<i4"),
+    "team": np.dtype("<i2"),
+}
+VALUE_DTYPE = np.dtype("<f4")
+
+# Content hash of the files a projection was computed from
+def data_hash(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+# "Top 4 %" -> "top_4_pct.f4"
+def _column_file(column):
+    return re.sub(r"[^a-z0-9]+", "_", column.lower().replace("%", "pct")).strip("_") + ".f4"
+
+class ProjectionHistory:
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        self.manifest = None
+        self.manifest_mtime = None
+        # team id -> row numbers, built from the team column up to index_rows
+        self.index = {}
+        self.index_rows = 0
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _empty_manifest(self):
+        return {"runs": 0, "rows": 0, "teams": [], "columns": {}}
+
+    # Re-reads the manifest if another process appended since; returns it
+    def refresh(self):
+        try:
+            mtime = os.stat(self._file("manifest.json")).st_mtime_ns
+        except FileNotFoundError:
+            self.manifest, self.manifest_mtime = self._empty_manifest(), None
+            return self.manifest
+        if mtime != self.manifest_mtime:
+            with open(self._file("manifest.json"), encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            self.manifest_mtime = mtime
+            if self.manifest["rows"] < self.index_rows:
+                self.index, self.index_rows = {}, 0
+        return self.manifest
+
+    # Identifies the stored data: changes whenever a run is appended
+    def version(self):
+        manifest = self.refresh()
+        return f"{manifest['runs']}-{manifest['rows']}"
+
+    def _column(self, filename, dtype, count):
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._file(filename), dtype=dtype, mode="r", shape=(count,))
+
+    # Appends one projected table (Team plus numeric columns) as a new run; returns its id
+    def append(self, table, data_hash="", num_simulations=0, run_time=None):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self.manifest_mtime = None
+            manifest = self.refresh()
+            runs, rows = manifest["runs"], manifest["rows"]
+
+            teams = manifest["teams"]
+            team_ids = {team: i for i, team in enumerate(teams)}
+            for team in table["Team"]:
+                if team not in team_ids:
+                    team_ids[team] = len(teams)
+                    teams.append(team)
+
+            values = {col: table[col] for col in table.columns
+                      if col != "Team" and pd.api.types.is_numeric_dtype(table[col])}
+            for col in values:
+                if col not in manifest["columns"]:
+                    # New column: earlier runs did not have it
+                    manifest["columns"][col] = _column_file(col)
+                    with open(self._file(manifest["columns"][col]), "wb") as f:
+                        f.write(np.full(rows, np.nan, dtype=VALUE_DTYPE).tobytes())
+
+            run_time = int(run_time if run_time is not None else time.time())
+            new_runs = {
+                "run_time": np.array([run_time], dtype=RUN_COLUMNS["run_time"]),
+                "data_hash": np.array([data_hash], dtype=RUN_COLUMNS["data_hash"]),
+                "simulations": np.array([num_simulations], dtype=RUN_COLUMNS["simulations"]),
+                "first_row": np.array([rows], dtype=RUN_COLUMNS["first_row"]),
+            }
+            new_rows = {
+                "run": np.full(len(table), runs, dtype=ROW_COLUMNS["run"]),
+                "team": np.array([team_ids[t] for t in table["Team"]], dtype=ROW_COLUMNS["team"]),
+            }
+            for col, filename in manifest["columns"].items():
+                column = values[col] if col in values else np.full(len(table), np.nan)
+                new_rows[filename] = np.asarray(column, dtype=VALUE_DTYPE)
+
+            for name, data in new_runs.items():
+                self._append_column(f"{name}.bin", data, runs)
+            for name, data in new_rows.items():
+                self._append_column(name if name.endswith(".f4") else f"{name}.bin", data, rows)
+
+            manifest.update(runs=runs + 1, rows=rows + len(table), teams=teams)
+            write_json_atomic(self._file("manifest.json"), manifest)
+            self.manifest_mtime = None
+            return runs
+
+    # Cuts the file back to the committed count (a crashed append), then appends
+    def _append_column(self, filename, data, count):
+        with open(self._file(filename), "ab") as f:
+            f.truncate(count * data.dtype.itemsize)
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Extends the team -> rows index with rows appended since the last query
+    def _team_rows(self, team_id):
+        manifest = self.refresh()
+        if self.index_rows < manifest["rows"]:
+            new = np.asarray(self._column("team.bin", ROW_COLUMNS["team"], manifest["rows"])[self.index_rows:])
+            order = np.argsort(new, kind="stable")
+            ids, starts = np.unique(new[order], return_index=True)
+            for i, rows in zip(ids, np.split(order + self.index_rows, starts[1:])):
+                self.index[int(i)] = np.concatenate([self.index.get(int(i), np.empty(0, dtype=np.int64)), rows])
+            self.index_rows = manifest["rows"]
+        return self.index.get(team_id, np.empty(0, dtype=np.int64))
+
+    def teams(self):
+        return list(self.refresh()["teams"])
+
+    def columns(self):
+        return list(self.refresh()["columns"])
+
+    # One team's values of the given columns in every run it appears in, oldest first:
+    # {"run_time": [unix seconds], "data_hash": [...], column: [values]}
+    def team_series(self, team, columns):
+        manifest = self.refresh()
+        unknown = [c for c in columns if c not in manifest["columns"]]
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(unknown)}")
+        if team not in manifest["teams"]:
+            return None
+        rows = self._team_rows(manifest["teams"].index(team))
+        runs = self._column("run.bin", ROW_COLUMNS["run"], manifest["rows"])[rows]
+        series = {
+            "run_time": self._column("run_time.bin", RUN_COLUMNS["run_time"], manifest["runs"])[runs].tolist(),
+            "data_hash": [h.decode() for h in self._column("data_hash.bin", RUN_COLUMNS["data_hash"], manifest["runs"])[runs]],
+        }
+        for col in columns:
+            values = self._column(manifest["columns"][col], VALUE_DTYPE, manifest["rows"])[rows]
+            series[col] = [None if np.isnan(v) else round(float(v), 2) for v in values]
+        return series
+
+    # All runs as a DataFrame (run, run_time, data_hash, simulations, first_row)
+    def runs(self):
+        manifest = self.refresh()
+        df = pd.DataFrame({name: np.asarray(self._column(f"{name}.bin", dtype, manifest["runs"]))
+                           for name, dtype in RUN_COLUMNS.items()})
+        df["data_hash"] = df["data_hash"].str.decode("ascii")
+        df.insert(0, "run", range(len(df)))
+        return df
+
+# ---------------------------------------------------------
+# BACKFILL
+# ---------------------------------------------------------
+# Appends every committed version of projected_standings.csv (oldest first, at its commit
+# time) that is not in the history yet, to recover the trend from before the store existed.
+def backfill_from_git(history, data_dir=DATA_DIR):
+    repo = subprocess.check_output(["git", "rev-parse", "--show-toplevel"], cwd=data_dir, text=True).strip()
+    rel = lambda name: os.path.relpath(os.path.join(data_dir, name), repo).replace(os.sep, "/")
+    log = subprocess.check_output(["git", "log", "--reverse", "--format=%H %ct", "--", rel("projected_standings.csv")],
+                                  cwd=repo, text=True).split("\n")
+    known = set(history.runs()["run_time"])
+    added = 0
+    for line in filter(None, log):
+        commit, commit_time = line.split()
+        if int(commit_time) in known:
+            continue
+        show = lambda name: subprocess.run(["git", "show", f"{commit}:{rel(name)}"], cwd=repo, capture_output=True).stdout
+        table = pd.read_csv(io.BytesIO(show("projected_standings.csv")))
+        # Same inputs as simulation_inputs(): results (or the match logs before they existed) and predictions
+        results = show("results_2025.csv") or show("future_matches_2025.csv")
+        inputs = hashlib.sha1(results + show("upcoming_predictions.csv"))
+        history.append(table, data_hash=inputs.hexdigest(), run_time=int(commit_time))
+        added += 1
+    return added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Projection history store")
+    parser.add_argument("--backfill-git", action="store_true", help="Append committed versions of projected_standings.csv")
+    parser.add_argument("--team", help="Print one team's trend")
+    args = parser.parse_args()
+
+    history = ProjectionHistory()
+    if args.backfill_git:
+        print(f"Appended {backfill_from_git(history)} runs from git history.")
+    if args.team:
+        series = history.team_series(args.team, [c for c in ("Projected Points", "Title %", "Top 4 %", "Relegation %")
+                                                 if c in history.columns()])
+        if series is None:
+            sys.exit(f"No history for {args.team}")
+        series["run_time"] = [datetime.fromtimestamp(t, tz=timezone.utc).strftime("%Y-%m-%d %H:%M") for t in series["run_time"]]
+        print(pd.DataFrame(series).drop(columns="data_hash").to_string(index=False))
+    else:
+        print(history.runs().to_string(index=False))
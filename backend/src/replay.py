@@ -0,0 +1,245 @@
+# As-of-date replay of past seasons: how would our projections have looked on a given
+# date, and how close were they to the real final table?
+#
+#     python backend/src/replay.py --season 2023                 # weekly cutoffs, all cores
+#     python backend/src/replay.py --season 2022 --cutoff 2023-01-01 --simulations 5000
+#
+# For each cutoff date the engine:
+#   1. rebuilds the standings from the season's results before the cutoff,
+#   2. trains the model on matches played before the cutoff (same features and
+#      season weighting as the live model, relative to the replayed season),
+#   3. predicts the season's remaining fixtures from every team's form at the cutoff,
+#   4. simulates the rest of the season (project_standings.simulate_leagues).
+# Projections are compared with the actual final table: points MAE, rank correlation and
+# Brier scores of the title / top 4 / relegation probabilities.
+#
+# The match features are built once into a feature store (output/feature_store.joblib,
+# rebuilt when matches_data.csv changes). Rolling features only look at earlier matches,
+# so every cutoff reuses the same table filtered by date instead of rebuilding it.
+# Cutoffs run in parallel worker processes that load the store once each.
+# Results go to output/replay/replay-<season>.csv and replay-<season>.json.
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from predict_future_matches import build_features, fit_model, latest_team_features, predict_fixture_table
+from project_standings import PREMIER_LEAGUE, sharpen_probabilities, simulate_leagues
+from projection_history import data_hash
+from atomic import write_csv_atomic, write_json_atomic
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+FEATURE_STORE = os.path.join(BASE_DIR, 'output', 'feature_store.joblib')
+REPLAY_DIR = os.path.join(BASE_DIR, 'output', 'replay')
+# Cutoffs with fewer training rows before them (early in the first season) are skipped
+MIN_TRAINING_ROWS = 200
+
+def store_inputs(data_dir=DATA_DIR):
+    return [os.path.join(data_dir, "matches_data.csv"), os.path.join(data_dir, "future_matches_2025.csv")]
+
+# ---------------------------------------------------------
+# FEATURE STORE
+# ---------------------------------------------------------
+# The match logs name a club differently as "team" ("Manchester United") and as
+# "opponent" ("Manchester Utd"). A club's match dates are exactly the dates on which its
+# opponent-style name appears, so each team maps to the opponent name with the same dates.
+def canonical_names(matches):
+    team_dates = matches.groupby("team")["date"].apply(set)
+    opponent_dates = matches.groupby("opponent")["date"].apply(set)
+    names = {}
+    for team, dates in team_dates.items():
+        overlap = {name: len(dates & other) / len(dates | other) for name, other in opponent_dates.items()}
+        names[team] = max(overlap, key=overlap.get)
+    return names
+
+# Match rows (one per team per match) with points and kick-off features, named canonically
+def load_matches(data_dir=DATA_DIR):
+    frames = [pd.read_csv(path) for path in store_inputs(data_dir) if os.path.exists(path)]
+    matches = pd.concat(frames, ignore_index=True).drop_duplicates(["date", "team", "opponent"])
+    matches["date"] = pd.to_datetime(matches["date"])
+    matches["points"] = matches["result"].map({"L": 0, "D": 1, "W": 3})
+    matches["hour"] = matches["time"].str.split(":").str[0].astype("int")
+    matches["day_code"] = matches["date"].dt.dayofweek
+    matches["name"] = matches["team"].map(canonical_names(matches))
+    return matches
+
+# Builds the feature store, or loads it if it was built from the same data files
+def load_feature_store(data_dir=DATA_DIR, path=FEATURE_STORE, rebuild=False):
+    key = data_hash(store_inputs(data_dir))
+    if not rebuild and os.path.exists(path):
+        store = joblib.load(path)
+        if store["key"] == key:
+            return store
+
+    print("Building feature store...")
+    features, predictors, cols, new_cols, opp_mapping = build_features(data_dir)
+    store = {
+        "key": key,
+        "features": features,
+        "predictors": predictors,
+        "cols": cols,
+        "new_cols": new_cols,
+        "opp_mapping": opp_mapping,
+        "matches": load_matches(data_dir),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(store, tmp_path)
+    os.replace(tmp_path, path)
+    return store
+
+# ---------------------------------------------------------
+# REPLAY
+# ---------------------------------------------------------
+# Real final table of a season: position by points, then goal difference, then goals
+def final_table(matches, season):
+    rows = matches[matches["season"] == season]
+    table = rows.groupby("name").agg(points=("points", "sum"), gf=("goals for", "sum"), ga=("goals against", "sum"))
+    table["gd"] = table["gf"] - table["ga"]
+    table = table.sort_values(["points", "gd", "gf"], ascending=False)
+    table["position"] = range(1, len(table) + 1)
+    return table
+
+# Every `every_days` days from the season's first match until its last matchday
+def season_cutoffs(matches, season, every_days=7):
+    dates = matches.loc[matches["season"] == season, "date"]
+    return list(pd.date_range(dates.min(), dates.max(), freq=f"{every_days}D", inclusive="left"))
+
+# Projected table of `season` as of `cutoff` (only data from before it is used)
+def replay_cutoff(store, season, cutoff, num_simulations=2000, seed=0):
+    matches = store["matches"]
+    cutoff = pd.Timestamp(cutoff)
+    season_rows = matches[matches["season"] == season]
+    teams = sorted(season_rows["name"].unique())
+
+    # 1. Standings at the cutoff
+    played = season_rows[season_rows["date"] < cutoff]
+    points = played.groupby("name")["points"].sum().reindex(teams, fill_value=0)
+
+    # 2. Model trained on what was known then
+    model = fit_model(store["features"][store["features"]["date"] < cutoff], store["predictors"], season=season)
+
+    # 3. Remaining fixtures, from each team's form at the cutoff; clubs with no history
+    # yet (e.g. promoted in the first season of the data) get the league average
+    remaining = season_rows[(season_rows["date"] >= cutoff) & (season_rows["venue"] == "Home")]
+    fixtures = pd.DataFrame({
+        "Date": remaining["date"].dt.date.to_numpy(),
+        "Home": remaining["name"].to_numpy(),
+        "Away": remaining["opponent"].to_numpy(),
+        "day_code": remaining["day_code"].to_numpy(),
+        "hour": remaining["hour"].to_numpy(),
+    })
+    history = matches[matches["date"] < cutoff].assign(new_team=lambda df: df["name"])
+    form = latest_team_features(history, store["cols"], season).reindex(teams)
+    form = form.fillna(form.mean()).fillna(0)
+    predictions = predict_fixture_table(model, form, fixtures, store["predictors"], store["cols"],
+                                        store["new_cols"], store["opp_mapping"])
+
+    # 4. Simulation of the rest of the season
+    probs = sharpen_probabilities(predictions[["Home Win %", "Draw %", "Away Win %"]].to_numpy() / 100)
+    league_matches = [{"Date": d, "Home": h, "Away": a, "Probs": p}
+                      for d, h, a, p in zip(fixtures["Date"], fixtures["Home"], fixtures["Away"], probs)]
+    table = simulate_leagues([(PREMIER_LEAGUE, points.to_dict(), league_matches)], num_simulations=num_simulations,
+                             rng=np.random.default_rng(seed))[PREMIER_LEAGUE.name]
+
+    actual = final_table(matches, season)
+    table.insert(0, "Cutoff", cutoff.date().isoformat())
+    table.insert(1, "Fixtures Left", len(fixtures))
+    table["Final Points"] = table["Team"].map(actual["points"])
+    table["Final Position"] = table["Team"].map(actual["position"])
+    return table
+
+# Accuracy of one cutoff's projection against the final table
+def score_projection(table):
+    zones = {"Title %": lambda pos: pos == 1, "Top 4 %": lambda pos: pos <= 4, "Relegation %": lambda pos: pos >= 18}
+    projected_rank = table["Projected Points"].rank(ascending=False)
+    scores = {
+        "cutoff": table["Cutoff"].iloc[0],
+        "fixtures_left": int(table["Fixtures Left"].iloc[0]),
+        "points_mae": round(float((table["Projected Points"] - table["Final Points"]).abs().mean()), 2),
+        "rank_corr": round(float(np.corrcoef(projected_rank, table["Final Position"].rank())[0, 1]), 3),
+    }
+    for column, in_zone in zones.items():
+        outcome = in_zone(table["Final Position"]).astype(float)
+        scores[f"brier_{column.split(' %')[0].lower().replace(' ', '')}"] = round(float(((table[column] / 100 - outcome) ** 2).mean()), 4)
+    favourite = table.loc[table["Title %"].idxmax()]
+    scores["favourite"] = favourite["Team"]
+    scores["favourite_title_pct"] = float(favourite["Title %"])
+    return scores
+
+_worker_store = None
+
+def _init_worker(path):
+    global _worker_store
+    _worker_store = joblib.load(path)
+
+def _replay_in_worker(season, cutoff, num_simulations, seed):
+    return replay_cutoff(_worker_store, season, cutoff, num_simulations, seed)
+
+# Replays every cutoff of a season across `workers` processes; returns (projections, scores)
+def replay_season(season, cutoffs=None, every_days=7, num_simulations=2000, workers=None, data_dir=DATA_DIR, seed=0):
+    store = load_feature_store(data_dir)
+    if season not in set(store["matches"]["season"]):
+        raise ValueError(f"No matches for season {season}")
+    games = store["matches"][store["matches"]["season"] == season].groupby("name").size()
+    if (games < PREMIER_LEAGUE.games).any():
+        raise ValueError(f"Season {season} is not finished, so there is no final table to compare with")
+    cutoffs = cutoffs or season_cutoffs(store["matches"], season, every_days)
+    known = store["features"]["date"]
+    skipped = [c for c in cutoffs if (known < c).sum() < MIN_TRAINING_ROWS]
+    if skipped:
+        print(f"Skipping {len(skipped)} cutoffs with under {MIN_TRAINING_ROWS} training rows (first: {skipped[0].date()})")
+    cutoffs = [c for c in cutoffs if c not in skipped]
+    if not cutoffs:
+        raise ValueError(f"No cutoff in {season} has enough training data")
+
+    tables = []
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(FEATURE_STORE,)) as pool:
+        futures = {pool.submit(_replay_in_worker, season, cutoff, num_simulations, seed + i): cutoff
+                   for i, cutoff in enumerate(cutoffs)}
+        for future in as_completed(futures):
+            tables.append(future.result())
+            print(f"  {pd.Timestamp(futures[future]).date()} done ({len(tables)}/{len(cutoffs)})")
+
+    projections = pd.concat(tables, ignore_index=True).sort_values(["Cutoff", "Projected Points"], ascending=[True, False])
+    scores = [score_projection(table) for _, table in projections.groupby("Cutoff")]
+    return projections, scores
+
+# ---------------------------------------------------------
+# MAIN EXECUTION
+# ---------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay past seasons' projections as of earlier dates")
+    parser.add_argument("--season", type=int, required=True, help="Season to replay (start year, e.g. 2023)")
+    parser.add_argument("--cutoff", action="append", help="Cutoff date (repeatable); default: weekly through the season")
+    parser.add_argument("--every", type=int, default=7, help="Days between cutoffs")
+    parser.add_argument("--simulations", type=int, default=2000, help="Monte Carlo simulations per cutoff")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the feature store")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.rebuild:
+        load_feature_store(rebuild=True)
+    projections, scores = replay_season(args.season, cutoffs=[pd.Timestamp(c) for c in args.cutoff or []],
+                                        every_days=args.every, num_simulations=args.simulations, workers=args.workers)
+    seconds = time.perf_counter() - start
+
+    print("\n" + "="*96)
+    print(f"REPLAY OF {args.season}-{str(args.season + 1)[-2:]} ({len(scores)} cutoffs, {args.simulations:,} simulations each, {seconds:.0f}s)")
+    print("="*96)
+    print(pd.DataFrame(scores).to_string(index=False))
+
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    write_csv_atomic(projections, os.path.join(REPLAY_DIR, f"replay-{args.season}.csv"))
+    write_json_atomic(os.path.join(REPLAY_DIR, f"replay-{args.season}.json"),
+                      {"season": args.season, "simulations": args.simulations, "seconds": round(seconds, 1), "cutoffs": scores})
+    print(f"\nSaved to {os.path.relpath(REPLAY_DIR, os.getcwd())}/replay-{args.season}.csv/.json")
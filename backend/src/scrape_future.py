@@ -2,117 +2,123 @@
 # This script scrapes the 2025-2026 Premier League season data from fbref
 # The format matches matches_data.csv
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchWindowException, InvalidSessionIdException
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import os
 
+from fbref import (SCHEDULE_URL, SHOOTING_STATS, shooting_log_url, parse_shooting_log,
+                   find_schedule_table, parse_schedule)
+from fetcher import RunLog, AdaptiveScheduler, fetch_page
+from browser import get_driver, print_challenge_notice
+
 # Define paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 
-def scrape_current_season():
-    # Set up Chrome driver
-    # Note: Running in non-headless mode to avoid Cloudflare bot protection
-    options = Options()
-    # Uncomment the next line if you want headless mode (may trigger Cloudflare protection):
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("window-size=1920,1080")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-
-    # Define base URL - this will default to the current season (2025-2026)
-    base_url = "https://fbref.com/en/comps/9/Premier-League-Stats"
-    standings_url = base_url
-
-    season_year = 2025  # 2025-2026 season
-    all_teams_data = []
+SEASON_YEAR = 2025  # 2025-2026 season
+# W/D/L, goals and opponent for every played match, taken from the schedule page.
+# get_current_standings reads this so a standings refresh is a single fetch.
+RESULTS_FILE = "results_2025.csv"
 
-    print(f"Scraping data for the {season_year} season from fbref...")
+# Legacy two-page mode: loads the team page to read the fixtures table and to find
+# the shooting log link. Returns (None, None) if the team should be skipped.
+def scrape_team_fixtures(driver, team_url, team_name, scheduler, run_log):
+    team_soup = fetch_page(driver, team_url, "table#matchlogs_for", scheduler, run_log, label=f"team {team_name}")
+    if team_soup is None:
+        return None, None
 
-    # Open season standings with Selenium
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.set_page_load_timeout(90)
-    try:
-        driver.get(standings_url)
-    except TimeoutException:
-        print("Page load timed out, but continuing...")
-        driver.execute_script("window.stop();")
-    except InvalidSessionIdException:
-        print("❌ Browser session lost (browser closed or crashed). Exiting...")
-        exit(1)
-    except WebDriverException as e:
-        print(f"WebDriverException encountered: {e}")
-        print("Attempting to proceed as the page might have redirected...")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        print("Attempting to proceed...")
+    fixtures_table = team_soup.find("table", id="matchlogs_for")
+    if not fixtures_table:
+        print(f"  No fixtures table found for {team_name}. Skipping.")
+        return None, None
+
+    fixtures_data = []
+    for row in fixtures_table.tbody.find_all("tr"):
+        cols = row.find_all("td")
+        if cols:
+            fixtures_data.append({
+                "Date": row.find("th").text.strip(),
+                "Time": cols[0].text.strip(),
+                "Competition": cols[1].text.strip(),
+                "Round": cols[2].text.strip(),
+                "Day": cols[3].text.strip(),
+                "Venue": cols[4].text.strip(),
+                "Result": cols[5].text.strip(),
+                "Goals For": cols[6].text.strip(),
+                "Goals Against": cols[7].text.strip(),
+                "Opponent": cols[8].text.strip(),
+            })
 
+    fixtures_df = pd.DataFrame(fixtures_data)
+
+    # Find shooting link
+    shooting_link = next((f"https://fbref.com{l.get('href')}" for l in team_soup.find_all("a", href=True)
+                          if 'all_comps/shooting/' in l.get('href')), None)
+    if not shooting_link:
+        print(f"  No shooting link found for {team_name}. Skipping.")
+        return None, None
+
+    return fixtures_df, shooting_link
+
+# Opens the first page of a run, giving the user time to pass a Cloudflare challenge,
+# and returns it parsed.
+def open_first_page(driver, url, scheduler, run_log):
     # Give user time to complete Cloudflare challenge manually
-    print("\n" + "="*60)
-    print("ATTENTION: If you see a Cloudflare challenge page,")
-    print("please complete the verification manually in the browser window.")
-    print("The script will wait for you to finish...")
-    print("="*60 + "\n")
+    print_challenge_notice()
 
-    # Wait for user to complete Cloudflare challenge - check every 2 seconds
     # Up to 2 minutes (120 seconds) for manual verification
     max_wait_time = 120
-    wait_interval = 2
-    elapsed_time = 0
-
     print("Waiting for page to load and Cloudflare challenge to complete...")
-    while elapsed_time < max_wait_time:
-        try:
-            # Check if the page has loaded by looking for the table
-            wait = WebDriverWait(driver, 2)
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table.stats_table")))
-            print("✓ Page loaded successfully!")
-            time.sleep(2)  # Extra wait to ensure everything is rendered
-            break
-        except NoSuchWindowException:
-            print("❌ Browser window closed. Exiting...")
-            exit(1)
-        except InvalidSessionIdException:
-            print("❌ Browser session lost. Exiting...")
-            exit(1)
-        except:
-            elapsed_time += wait_interval
-            if elapsed_time % 10 == 0:  # Print progress every 10 seconds
-                print(f"Still waiting... ({elapsed_time}/{max_wait_time} seconds)")
-            time.sleep(wait_interval)
+    soup = fetch_page(driver, url, "table.stats_table", scheduler, run_log,
+                      max_wait=max_wait_time, retries=0, label="first page", progress=True)
+    if soup is None:
+        exit(1)
+    if soup.select_one("table.stats_table") is not None:
+        print("✓ Page loaded successfully!")
     else:
         print(f"\n⚠ Warning: Timeout after {max_wait_time} seconds.")
         print("The page may still be loading. Proceeding anyway...")
+    return soup
 
-    try:
-        page_source = driver.page_source
-    except NoSuchWindowException:
-        print("❌ Browser window closed. Exiting...")
-        exit(1)
-    except InvalidSessionIdException:
-        print("❌ Browser session lost. Exiting...")
-        exit(1)
-    except Exception as e:
-        print(f"❌ Error getting page source: {e}")
-        exit(1)
+# Loads the season schedule page once and saves every played result (RESULTS_FILE)
+# and the upcoming fixtures (fixtures.csv) from it.
+# Returns (results_df, fixtures_df, team_urls), or None if the schedule could not be read.
+def ingest_schedule(driver, scheduler, run_log, data_dir=DATA_DIR):
+    soup = open_first_page(driver, SCHEDULE_URL, scheduler, run_log)
 
-    # driver.quit()
+    schedule_table = find_schedule_table(soup)
+    if schedule_table is None or schedule_table.tbody is None:
+        print("Could not find the schedule table.")
+        print("Saving page source for debugging...")
+        with open(os.path.join(BASE_DIR, 'output', "debug_page.html"), "w", encoding="utf-8") as f:
+            f.write(str(soup))
+        print("Page source saved to debug_page.html")
+        return None
 
-    soup = BeautifulSoup(page_source, "html.parser")
+    results_df, fixtures_df, team_urls = parse_schedule(schedule_table)
+    print(f"Schedule: {len(results_df) // 2} played matches, {len(fixtures_df)} upcoming, {len(team_urls)} teams.")
 
+    results = results_df.copy()
+    results["Season"] = SEASON_YEAR
+    results.columns = [c.lower() for c in results.columns]
+    results.to_csv(os.path.join(data_dir, RESULTS_FILE), index=False)
+    # Schedule names are already the short display names used in fixtures.csv
+    fixtures_df.to_csv(os.path.join(data_dir, "fixtures.csv"), index=False)
+    print(f"✅ Saved results to {RESULTS_FILE} and fixtures to fixtures.csv")
+
+    return results_df, fixtures_df, team_urls
+
+# Refreshes results and upcoming fixtures from the schedule page: one page load,
+# enough for get_current_standings. Shooting stats are left as they are.
+def refresh_results(data_dir=DATA_DIR):
+    run_log = RunLog("refresh")
+    try:
+        return ingest_schedule(get_driver(), AdaptiveScheduler(), run_log, data_dir) is not None
+    finally:
+        run_log.close()
+
+# Reads the squad URLs from the standings page (used when not starting from the schedule).
+# Returns None if the standings table is missing.
+def find_team_urls(soup):
     # Debug: Check what tables exist on the page
     all_tables = soup.find_all("table")
     print(f"Found {len(all_tables)} tables on the page")
@@ -140,126 +146,99 @@ def scrape_current_season():
         print("Could not find standings table with any method.")
         print("Saving page source for debugging...")
         with open(os.path.join(BASE_DIR, 'output', "debug_page.html"), "w", encoding="utf-8") as f:
-            f.write(page_source)
+            f.write(str(soup))
         print("Page source saved to debug_page.html")
-        driver.quit()
-        return False
+        return None
 
     links = [l.get("href") for l in standings_table.find_all('a', href=True)]
     team_urls = [f"https://fbref.com{l}" for l in links if '/squads/' in l]
+    return team_urls
+
+# from_schedule=True takes results for every team from the schedule page in one fetch
+# and only visits each team's shooting log for the shooting stats the model needs.
+# from_schedule=False starts from the standings page instead; there, single_page=True
+# builds each team's rows from the shooting match log alone (one page load per team)
+# and single_page=False keeps the old team page + shooting page merge.
+def scrape_current_season(single_page=True, from_schedule=True, data_dir=DATA_DIR):
+    season_year = SEASON_YEAR
+    all_teams_data = []
+
+    print(f"Scraping data for the {season_year} season from fbref...")
+    # Shared, warm browser session (see browser.py); it stays open for later scrapes
+    driver = get_driver()
+    scheduler = AdaptiveScheduler()
+    run_log = RunLog("current_season")
+
+    if from_schedule:
+        schedule = ingest_schedule(driver, scheduler, run_log, data_dir)
+        if schedule is None:
+            run_log.close()
+            return False
+        results_df, _, team_urls = schedule
+    else:
+        # Define base URL - this will default to the current season (2025-2026)
+        standings_url = "https://fbref.com/en/comps/9/Premier-League-Stats"
+        soup = open_first_page(driver, standings_url, scheduler, run_log)
+        team_urls = find_team_urls(soup)
+        if team_urls is None:
+            run_log.close()
+            return False
 
     print(f"Found {len(team_urls)} teams to scrape.")
 
     for team_url in team_urls:
         team_name = team_url.split("/")[-1].replace("-Stats", "").replace("-", " ")  # cleans the team name from the team URL
         print(f"Scraping data for {team_name}...")
-        
-        # Scrape fixtures using Selenium
-        # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        try:
-            driver.get(team_url)
-        except TimeoutException:
-            print("Page load timed out, but continuing...")
-            driver.execute_script("window.stop();")
-        except InvalidSessionIdException:
-            print("❌ Browser session lost. Exiting...")
-            exit(1)
-        except WebDriverException as e:
-            print(f"WebDriverException encountered: {e}")
-            print("Attempting to proceed...")
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            print("Attempting to proceed...")
-        
-        try:
-            team_soup = BeautifulSoup(driver.page_source, "html.parser")
-        except Exception as e:
-            print(f"Error getting page source: {e}")
-            continue
-        # driver.quit()
-        
-        fixtures_table = team_soup.find("table", id="matchlogs_for")
-        if not fixtures_table:
-            print(f"  No fixtures table found for {team_name}. Skipping.")
-            continue
-        
-        fixtures_data = []
-        for row in fixtures_table.tbody.find_all("tr"):
-            cols = row.find_all("td")
-            if cols:
-                fixtures_data.append({
-                    "Date": row.find("th").text.strip(),
-                    "Time": cols[0].text.strip(),
-                    "Competition": cols[1].text.strip(),
-                    "Round": cols[2].text.strip(),
-                    "Day": cols[3].text.strip(),
-                    "Venue": cols[4].text.strip(),
-                    "Result": cols[5].text.strip(),
-                    "Goals For": cols[6].text.strip(),
-                    "Goals Against": cols[7].text.strip(),
-                    "Opponent": cols[8].text.strip(),
-                })
-        
-        fixtures_df = pd.DataFrame(fixtures_data)
-        
-        # Find shooting link
-        shooting_link = next((f"https://fbref.com{l.get('href')}" for l in team_soup.find_all("a", href=True)
-                              if 'all_comps/shooting/' in l.get('href')), None)
-        if not shooting_link:
-            print(f"  No shooting link found for {team_name}. Skipping.")
-            continue
-        
+
+        if from_schedule or single_page:
+            # The shooting log already has date, venue, result, goals and opponent,
+            # so go straight to it using the team id from the squad link
+            shooting_link = shooting_log_url(team_url, season_year)
+        else:
+            fixtures_df, shooting_link = scrape_team_fixtures(driver, team_url, team_name, scheduler, run_log)
+            if fixtures_df is None:
+                continue
+
         # Scrape shooting data
-        # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        try:
-            driver.get(shooting_link)
-        except TimeoutException:
-            print("Page load timed out, but continuing...")
-            driver.execute_script("window.stop();")
-        except InvalidSessionIdException:
-            print("❌ Browser session lost. Exiting...")
-            exit(1)
-        except WebDriverException as e:
-            print(f"WebDriverException encountered: {e}")
-            print("Attempting to proceed...")
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            print("Attempting to proceed...")
-        
-        try:
-            shooting_soup = BeautifulSoup(driver.page_source, "html.parser")
-        except Exception as e:
-            print(f"Error getting page source: {e}")
+        shooting_soup = fetch_page(driver, shooting_link, "table#matchlogs_for", scheduler, run_log, label=f"shooting {team_name}")
+        if shooting_soup is None:
             continue
-        # driver.quit()
-        
+
         shooting_table = shooting_soup.find("table", id="matchlogs_for")
         if not shooting_table:
             print(f"  No shooting table found for {team_name}. Skipping.")
             continue
         
-        shooting_data = []
-        for row in shooting_table.tbody.find_all("tr"):
-            cols = row.find_all("td")
-            if cols:
-                shooting_data.append({
-                    "Date": row.find("th").text.strip(),
-                    "Shots Total": cols[10].text.strip(),
-                    "Shots on Target": cols[11].text.strip(),
-                    "Average Shot Distance": cols[15].text.strip(),
-                    "Free Kicks": cols[16].text.strip(),
-                    "Penalty Kicks Scored": cols[17].text.strip(),
-                    "Penalty Kicks Attempted": cols[18].text.strip(),
-                })
+        if from_schedule:
+            # Results come from the schedule; the shooting log only adds the shooting stats
+            shooting_df = parse_shooting_log(shooting_table)[["Date"] + SHOOTING_STATS]
+            team_results = results_df[results_df["Team"] == team_name].drop(columns="Team")
+            team_df = team_results.merge(shooting_df, on="Date")
+        elif single_page:
+            team_df = parse_shooting_log(shooting_table)
+        else:
+            shooting_data = []
+            for row in shooting_table.tbody.find_all("tr"):
+                cols = row.find_all("td")
+                if cols:
+                    shooting_data.append({
+                        "Date": row.find("th").text.strip(),
+                        "Shots Total": cols[10].text.strip(),
+                        "Shots on Target": cols[11].text.strip(),
+                        "Average Shot Distance": cols[15].text.strip(),
+                        "Free Kicks": cols[16].text.strip(),
+                        "Penalty Kicks Scored": cols[17].text.strip(),
+                        "Penalty Kicks Attempted": cols[18].text.strip(),
+                    })
         
-        shooting_df = pd.DataFrame(shooting_data)
+            shooting_df = pd.DataFrame(shooting_data)
         
-        # Merge with accounting for teams that shooting data is not available as this would give a ValueError 
-        try:
-            team_df = fixtures_df.merge(shooting_df, on="Date")
-        except Exception as e:
-            print(f"  Merge failed for {team_name}: {e}. Skipping.")
-            continue
+            # Merge with accounting for teams that shooting data is not available as this would give a ValueError 
+            try:
+                team_df = fixtures_df.merge(shooting_df, on="Date")
+            except Exception as e:
+                print(f"  Merge failed for {team_name}: {e}. Skipping.")
+                continue
         
         # Filter out other competitions than Premier League
         team_df = team_df[team_df["Competition"] == "Premier League"]
@@ -270,9 +249,9 @@ def scrape_current_season():
         
         all_teams_data.append(team_df)
         print(f"  Successfully scraped {len(team_df)} matches for {team_name}.")
-        time.sleep(2)  # Be respectful to the server
 
     print(f"Collected data for {len(all_teams_data)} teams.")
+    run_log.close()
 
     # Combine all teams data into a single DataFrame
     if all_teams_data:
@@ -280,13 +259,15 @@ def scrape_current_season():
         combined_df.columns = [c.lower() for c in combined_df.columns]
         
         # Save the DataFrame to a CSV file
-        combined_df.to_csv(os.path.join(DATA_DIR, "future_matches_2025.csv"), index=False)
+        combined_df.to_csv(os.path.join(data_dir, "future_matches_2025.csv"), index=False)
         print(f"✅ Saved {len(combined_df)} matches to future_matches_2025.csv")
-        driver.quit()
+        if not from_schedule:
+            # Keep the results file in step, since get_current_standings reads it
+            results = combined_df.drop(columns=[c.lower() for c in SHOOTING_STATS])
+            results.to_csv(os.path.join(data_dir, RESULTS_FILE), index=False)
         return True
     else:
         print("❌ No data was collected.")
-        driver.quit()
         return False
 
 if __name__ == "__main__":
@@ -37,3 +37,120 @@ function showLoader() {
         btn.style.cursor = "not-allowed";
     }
 }
+
+/* Background simulation
+ * /run/simulate redirects back here with ?job=<id>; poll the job until it finishes
+ * and then reload the page to show the new projections. */
+function pollJob(jobId) {
+    showLoader();
+    const btn = document.querySelector('.btn-simulate');
+
+    fetch("/jobs/" + jobId)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === "done") {
+                window.location.href = "/";
+            } else if (job.status === "failed" || job.error) {
+                document.getElementById('loader').style.display = 'none';
+                if (btn) btn.innerText = "Simulation failed: " + (job.error || "unknown job");
+            } else {
+                if (btn) btn.innerText = "Running Simulation... " + Math.round(job.progress * 100) + "%";
+                setTimeout(() => pollJob(jobId), 1000);
+            }
+        })
+        .catch(() => setTimeout(() => pollJob(jobId), 2000));
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    const loader = document.getElementById('loader');
+    if (loader && loader.dataset.job) pollJob(loader.dataset.job);
+});
+
+/* Charts
+ * Drawn in the browser from /api/v1/standings instead of fetching server-rendered PNGs.
+ * If the API call fails, the chart falls back to the PNG endpoint. */
+const CHARTS = {
+    title_race: {
+        column: "Title %", min: 0.1, color: "skyblue",
+        empty: "No Title Contenders (>0.1%)", alt: "Title Race Chart"
+    },
+    relegation: {
+        column: "Relegation %", min: 1.0, color: "salmon",
+        empty: "No Relegation Candidates (>1%)", alt: "Relegation Chart"
+    }
+};
+
+function drawBarChart(container, teams, chart) {
+    const rowHeight = 28;
+    const labelWidth = 140;
+    const width = container.clientWidth || 500;
+    const height = Math.max(teams.length, 3) * rowHeight + 20;
+    const ratio = window.devicePixelRatio || 1;
+
+    const canvas = document.createElement("canvas");
+    canvas.width = width * ratio;
+    canvas.height = height * ratio;
+    canvas.style.height = height + "px";
+    canvas.setAttribute("role", "img");
+    canvas.setAttribute("aria-label", chart.alt);
+    const ctx = canvas.getContext("2d");
+    ctx.scale(ratio, ratio);
+    ctx.font = "13px 'Segoe UI', Tahoma, sans-serif";
+    ctx.textBaseline = "middle";
+
+    if (teams.length === 0) {
+        ctx.fillStyle = "#333";
+        ctx.textAlign = "center";
+        ctx.fillText(chart.empty, width / 2, height / 2);
+    } else {
+        const maxValue = Math.max(...teams.map(t => t[chart.column]));
+        const barSpace = width - labelWidth - 60;
+        teams.forEach((team, i) => {
+            const value = team[chart.column];
+            const y = 10 + i * rowHeight;
+            const barWidth = maxValue > 0 ? (value / maxValue) * barSpace : 0;
+            ctx.fillStyle = "#333";
+            ctx.textAlign = "right";
+            ctx.fillText(team.Team, labelWidth - 8, y + rowHeight / 2);
+            ctx.fillStyle = chart.color;
+            ctx.fillRect(labelWidth, y + 4, barWidth, rowHeight - 8);
+            ctx.fillStyle = "#333";
+            ctx.textAlign = "left";
+            ctx.fillText(value + "%", labelWidth + barWidth + 6, y + rowHeight / 2);
+        });
+    }
+    container.replaceChildren(canvas);
+}
+
+function showChartImage(container, name) {
+    const img = document.createElement("img");
+    img.src = "/plot/" + name;
+    img.alt = CHARTS[name].alt;
+    container.replaceChildren(img);
+}
+
+function loadCharts() {
+    const containers = document.querySelectorAll(".chart[data-chart]");
+    if (containers.length === 0) return;
+
+    fetch("/api/v1/standings?fields=Team,Title %25,Relegation %25")
+        .then(response => {
+            if (!response.ok) throw new Error("HTTP " + response.status);
+            return response.json();
+        })
+        .then(data => {
+            containers.forEach(container => {
+                const chart = CHARTS[container.dataset.chart];
+                // Largest probability first, same filters as the PNG charts
+                const teams = data.standings
+                    .filter(t => t[chart.column] > chart.min)
+                    .sort((a, b) => b[chart.column] - a[chart.column]);
+                drawBarChart(container, teams, chart);
+            });
+        })
+        .catch(() => {
+            containers.forEach(container => showChartImage(container, container.dataset.chart));
+        });
+}
+
+document.addEventListener("DOMContentLoaded", loadCharts);